@@ -1,74 +1,351 @@
+import atexit
+import hmac
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+import tempfile
+import time
+import zipfile
+from contextlib import nullcontext
+from functools import partial
+from flask import (Blueprint, Flask, current_app, render_template, request, redirect, url_for, flash, jsonify,
+                   Response, abort, g, send_file, send_from_directory, session, stream_with_context)
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from flask_sock import Sock
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.local import LocalProxy
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
-import numpy as np
-from PIL import Image
-import keras
-import tensorflow as tf
-from datetime import datetime
-from dotenv import load_dotenv
-
-# Load environment variables from pro.env
-load_dotenv(dotenv_path='pro.env')  # Make sure to load from your pro.env file
-
-# Initialize Flask app
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')  # Loaded from pro.env
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')  # Loaded from pro.env
-app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER')  # Loaded from pro.env
-app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
-
-# Ensure upload directory exists
-app.config['UPLOAD_FOLDER'] = 'static/uploads'  # or any folder name you want
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Initialize database
-db = SQLAlchemy(app)
-
-# Initialize login manager
+from datetime import datetime, timedelta
+from config import config
+from utils.history_pages import keyset_page
+from utils.database import add_missing_columns, engine_options, normalize_database_uri
+from utils.history_recorder import HistoryRecorder, enable_sqlite_wal
+from utils.inference_engine import BatchingInferenceEngine
+from utils.labels import load_labels
+from utils.metrics import Metrics
+from utils.model_registry import ModelRegistry
+from utils.preprocessing import (MODEL_INPUT_SIZE, read_upload, decode_image, normalize, raw_frame_size,
+                                 raw_to_png, raw_to_tensor)
+from utils.upload_store import UploadStore, apply_references, rebuild_references
+from utils.user_cache import TokenSigner, UserCache, UserIdentity, credential_fingerprint
+from utils.usage_stats import StatsCache, UsageDeltas, apply_deltas, rebuild
+from utils.prediction_cache import PredictionCache, content_hash
+from utils.passwords import PasswordHasher, HashingBusyError
+from utils.webcam_stream import serve_webcam_stream
+from utils.stream_decoder import SignStreamDecoder
+from utils.video_pipeline import recognize_video, to_segments
+from utils.batch_predict import check_zip, iter_zip, iter_rows, predict_stream
+from utils.worker_pool import InferenceWorkerPool, PoolBusyError, InferenceTimeoutError
+
+db = SQLAlchemy()
+sock = Sock()
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 
-# Load the model
-def load_model_with_custom_objects(filepath):
-    try:
-        return tf.keras.models.load_model(filepath)
-    except TypeError as e:
-        if "batch_shape" in str(e):
-            # Load the model file as an h5 file first
-            with keras.utils.custom_object_scope({
-                'InputLayer': lambda config: keras.layers.InputLayer(
-                    shape=config.get('batch_shape')[1:] if config.get('batch_shape') else None,
-                    dtype=config.get('dtype'),
-                    sparse=config.get('sparse', False),
-                    ragged=config.get('ragged', False),
-                    name=config.get('name')
-                )
-            }):
-                return tf.keras.models.load_model(filepath)
+# Every route, hook and CLI command; create_app registers it on each application it builds
+main = Blueprint('main', __name__, cli_group=None)
+
+
+def create_app(config_name=None):
+    """
+    Build the Flask application from one of the config.py configuration classes
+
+    Args:
+        config_name: Key of config.config ('development', 'testing', 'production');
+            defaults to the FLASK_CONFIG environment variable, then 'default'
+
+    Returns:
+        Configured Flask application with the database, login manager, WebSockets, routes
+        and its own Services attached
+    """
+    config_class = config[config_name or os.environ.get('FLASK_CONFIG', 'default')]
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    app.config['ALLOWED_EXTENSIONS'] = app.config['ALLOWED_IMAGE_EXTENSIONS']
+
+    database_uri = normalize_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        database_uri,
+        pool_size=app.config['DB_POOL_SIZE'],
+        max_overflow=app.config['DB_MAX_OVERFLOW'],
+        pool_timeout=app.config['DB_POOL_TIMEOUT'],
+        pool_recycle=app.config['DB_POOL_RECYCLE'],
+        pre_ping=app.config['DB_POOL_PRE_PING']
+    )
+    # WebSocket support for the live webcam stream
+    app.config['SOCK_SERVER_OPTIONS'] = {'max_message_size': app.config['WEBCAM_MAX_FRAME_BYTES']}
+
+    # Ensure upload directory exists
+    config_class.init_app(app)
+
+    db.init_app(app)
+    sock.init_app(app)
+    login_manager.init_app(app)
+    if app.config['SQLITE_WAL']:
+        with app.app_context():
+            enable_sqlite_wal(db.engine)
+
+    app.extensions['isl'] = Services(app)
+    app.register_blueprint(main)
+    init_database(app)
+    return app
+
+
+def init_database(app):
+    """
+    Create missing tables, indexes and columns for an application's database
+
+    Args:
+        app: Flask application built by create_app
+    """
+    with app.app_context():
+        db.create_all()
+        # create_all() skips tables that already exist, so indexes added later are created here
+        for table in (Prediction.__table__, Translation.__table__):
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+        with db.engine.begin() as connection:
+            # Superseded by the unique index below
+            connection.execute(text('DROP INDEX IF EXISTS ix_usage_statistics_user_id'))
+        for index in UsageStatistics.__table__.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except IntegrityError:
+                # Duplicate rows from before user_id was unique; recounting from the history leaves one per user
+                with db.engine.begin() as connection:
+                    rebuild(connection, usage_tables(), Prediction.__table__, Translation.__table__)
+                index.create(db.engine, checkfirst=True)
+        # ...and nullable columns added later are added here
+        add_missing_columns(db.engine, [(Prediction.__table__, 'model_version'),
+                                        (Translation.__table__, 'model_version')])
+
+
+class Services:
+    """
+    The caches, background workers and model handles one application shares across requests
+
+    Built by create_app from that application's config, so two apps never share state;
+    the module-level proxies below resolve to the current application's instances.
+    """
+
+    def __init__(self, app):
+        """
+        Build every component from app.config
+
+        Args:
+            app: Flask application being created
+        """
+        cfg = app.config
+
+        # Request counters and per-stage latency histograms, scraped from /metrics
+        self.metrics = Metrics(prefix='isl')
+
+        # Uploads are written in the background under content-addressed names, off the prediction path
+        self.upload_store = UploadStore(
+            cfg['UPLOAD_FOLDER'],
+            thumbnail_size=cfg['UPLOAD_THUMBNAIL_SIZE']
+        ) if cfg['PERSIST_UPLOADS'] else None
+        if self.upload_store is not None:
+            atexit.register(self.upload_store.close)
+
+        # The model is loaded lazily on the first prediction so routes like /login never pay for TensorFlow;
+        # once loaded, a replaced model file is picked up in the background without a restart
+        self.model_registry = ModelRegistry(
+            cfg['MODEL_PATH'],
+            backend=cfg['MODEL_BACKEND'],
+            num_threads=cfg['MODEL_NUM_THREADS'],
+            keep_versions=cfg['MODEL_KEEP_VERSIONS'],
+            watch_interval=0 if cfg['INFERENCE_WORKERS'] else cfg['MODEL_WATCH_INTERVAL']
+        )
+        atexit.register(self.model_registry.close)
+        if cfg['PRELOAD_MODEL'] and not cfg['INFERENCE_WORKERS']:
+            self.model_registry.warm_up()
+
+        # Class labels, in model output order; edit models/labels.json when the model's classes change
+        self.class_labels = load_labels(cfg['LABELS_PATH'])
+
+        if cfg['INFERENCE_WORKERS']:
+            # Inference runs in worker processes; the web process never loads the model
+            self.inference_engine = InferenceWorkerPool(
+                cfg['MODEL_PATH'],
+                class_labels=self.class_labels,
+                num_workers=cfg['INFERENCE_WORKERS'],
+                backend=cfg['MODEL_BACKEND'],
+                threads_per_worker=cfg['INFERENCE_WORKER_THREADS'],
+                max_pending=cfg['INFERENCE_MAX_PENDING'],
+                timeout=cfg['INFERENCE_TIMEOUT'],
+                max_batch_size=cfg['INFERENCE_MAX_BATCH_SIZE'],
+                tensor_slots=cfg['INFERENCE_SHM_TENSOR_SLOTS'],
+                top_k=cfg['PREDICTION_TOP_K'],
+                watch_interval=cfg['MODEL_WATCH_INTERVAL']
+            )
+            self.get_predictor = lambda: self.inference_engine
+            # Follows each worker's model swaps on its own
+            self.live_predictor = self.inference_engine
         else:
-            raise e
+            # Shared engine that batches concurrent prediction requests into one forward pass
+            self.inference_engine = BatchingInferenceEngine(
+                predict_fn=self.run_model_batch,
+                class_labels=self.class_labels,
+                max_batch_size=cfg['INFERENCE_MAX_BATCH_SIZE'],
+                max_wait_ms=cfg['INFERENCE_MAX_WAIT_MS'],
+                top_k=cfg['PREDICTION_TOP_K']
+            )
+            self.get_predictor = self.model_registry.get
+            # Resolves the active version on every call, for sessions that outlive a swap
+            self.live_predictor = self.model_registry
+        # Serves what is already queued, then stops the batching thread or worker processes
+        atexit.register(self.inference_engine.close)
+
+        # Re-submitted images (sample images, repeated captures) are answered without running the model
+        self.prediction_cache = PredictionCache(
+            max_entries=cfg['PREDICTION_CACHE_SIZE'],
+            ttl_seconds=cfg['PREDICTION_CACHE_TTL']
+        )
+
+        # Rendered /api/stats responses; the history writer drops a user's entry when it writes their rows
+        self.stats_cache = StatsCache(ttl_seconds=cfg['STATS_CACHE_TTL'])
+
+        # History rows are written in bulk by a background thread instead of one commit per request
+        self.history_recorder = HistoryRecorder(
+            partial(write_history, app),
+            max_batch_size=cfg['HISTORY_BATCH_SIZE'],
+            flush_interval=cfg['HISTORY_FLUSH_INTERVAL'],
+            max_pending=cfg['HISTORY_MAX_PENDING']
+        )
+        atexit.register(self.history_recorder.close)
+
+        # Logged-in users are served from memory; only a miss (or an expired entry) queries the database
+        self.user_cache = UserCache(ttl_seconds=cfg['USER_CACHE_TTL'], max_entries=cfg['USER_CACHE_SIZE'])
+
+        # Stateless bearer tokens for API clients; verifying one never touches the database
+        self.token_signer = TokenSigner(cfg['SECRET_KEY'], max_age=cfg['API_TOKEN_MAX_AGE'])
+
+        # Password hashing runs on its own few threads so a burst of logins cannot take every core from inference
+        self.password_hasher = PasswordHasher(
+            method=cfg['PASSWORD_HASH_METHOD'],
+            salt_length=cfg['PASSWORD_SALT_LENGTH'],
+            max_workers=cfg['PASSWORD_HASH_WORKERS'],
+            max_pending=cfg['PASSWORD_HASH_MAX_PENDING']
+        )
+        atexit.register(self.password_hasher.close)
+
+        # Component counters exported as gauges on every scrape
+        self.metrics.add_collector('inference', lambda: self.inference_engine.stats())
+        self.metrics.add_collector('prediction_cache', lambda: self.prediction_cache.stats())
+        self.metrics.add_collector('history', lambda: self.history_recorder.stats())
+        self.metrics.add_collector('user_cache', lambda: self.user_cache.stats())
+        self.metrics.add_collector('password_hasher', lambda: self.password_hasher.stats())
+        if not cfg['INFERENCE_WORKERS']:
+            self.metrics.add_collector('model_registry', lambda: self.model_registry.stats())
+
+    def run_model_batch(self, batch):
+        """
+        Run one batch for the BatchingInferenceEngine on the active model version
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3) with values in [0, 1]
+
+        Returns:
+            (probabilities, model version) tuple
+        """
+        # Held for the whole pass, so a batch started before a swap finishes on the old version
+        predictor = self.model_registry.get()
+        # Forward-pass time alone; the requests' 'inference' stage also includes waiting for a batch
+        started = time.perf_counter()
+        predictions = predictor.predict_batch(batch)
+        self.metrics.observe('model_batch_duration_seconds', time.perf_counter() - started)
+        self.metrics.inc('model_batch_items_total', amount=len(batch))
+        return predictions, predictor.model_version
+
+
+def services(app=None):
+    """
+    Return the Services create_app built for an application
+
+    Args:
+        app: Flask application; defaults to the current one
+
+    Returns:
+        Services instance
+    """
+    return (app or current_app).extensions['isl']
+
+
+def _service(name):
+    return LocalProxy(lambda: getattr(services(), name))
+
+
+# Resolve to the current application's instances inside a request, CLI command or app context.
+# upload_store proxies None when PERSIST_UPLOADS is off: test it with `not upload_store`, never `is None`
+metrics = _service('metrics')
+upload_store = _service('upload_store')
+model_registry = _service('model_registry')
+class_labels = _service('class_labels')
+inference_engine = _service('inference_engine')
+get_predictor = _service('get_predictor')
+live_predictor = _service('live_predictor')
+prediction_cache = _service('prediction_cache')
+stats_cache = _service('stats_cache')
+history_recorder = _service('history_recorder')
+user_cache = _service('user_cache')
+token_signer = _service('token_signer')
+password_hasher = _service('password_hasher')
+
 
-model = tf.keras.models.load_model('/Users/nithyareddy/sign-language-recognition/models/isl_rnn_model.keras')
+def stage(name):
+    """Time a block of the current request as one stage of its /metrics breakdown"""
+    timer = g.get('timer')
+    return timer.stage(name) if timer is not None else nullcontext()
 
-# Class labels (ensure these match your model's classes)
-class_labels = [
-    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 
-    'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 
-    'U', 'V', 'W', 'X', 'Y', 'Z', '1', '2', '3', '4', 
-    '5', '6', '7', '8', '9'  # Adjust based on your dataset
-]
+
+def predict_upload(data, raw=False):
+    """Predict upload bytes, skipping decode and inference when the same bytes were seen before"""
+    # Only the first request pays here: the model is loaded lazily
+    with stage('model_load'):
+        model_version = get_predictor().model_version
+    with stage('cache_lookup'):
+        digest = content_hash(data)
+        result = prediction_cache.get(digest, model_version)
+    if result is None:
+        if raw:
+            # Already at the model input size; the bytes are scaled in place of a decode
+            with stage('normalize'):
+                tensor = raw_to_tensor(data)
+        else:
+            # Image.open + draft + resize, then the float32 scaling, timed apart
+            with stage('decode'):
+                pixels = decode_image(data)
+            with stage('normalize'):
+                tensor = normalize(pixels)
+        with stage('inference'):
+            result = inference_engine.predict(tensor)
+        # A result from the version being swapped out must not be cached under the new one
+        if result.model_version == model_version:
+            prediction_cache.put(digest, model_version, result)
+    return result, digest
+
+def store_upload(data, filename, digest=None):
+    """Schedule the upload to be persisted and return the name to record for it"""
+    if not upload_store:
+        return secure_filename(filename)
+    return upload_store.save_async(data, filename.rsplit('.', 1)[1], digest=digest)
+
+def upload_url(filename):
+    return url_for('main.upload_file', filename=filename) if upload_store else None
+
+def thumbnail_url(filename):
+    return url_for('main.upload_thumbnail', filename=filename) if upload_store else None
 
 # User model
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # PostgreSQL enforces VARCHAR lengths; leave room for longer hash formats
+    password_hash = db.Column(db.String(255), nullable=False)
     date_joined = db.Column(db.DateTime, default=datetime.utcnow)
     predictions = db.relationship('Prediction', backref='user', lazy=True)
     settings = db.relationship('UserSettings', backref='user', uselist=False)
@@ -77,21 +354,28 @@ class User(UserMixin, db.Model):
 # Prediction history model
 class Prediction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    filename = db.Column(db.String(100), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
     predicted_class = db.Column(db.String(10), nullable=False)
     confidence = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    model_version = db.Column(db.String(64), nullable=True)  # NULL for rows written before versions were recorded
+
+    # Serves the per-user, newest-first history listings
+    __table_args__ = (db.Index('ix_prediction_user_timestamp', 'user_id', 'timestamp'),)
 
 # Translations model
 class Translation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    image_path = db.Column(db.String(100), nullable=False)
-    prediction = db.Column(db.String(10), nullable=False)
+    image_path = db.Column(db.String(255), nullable=False)
+    prediction = db.Column(db.String(255), nullable=False)  # letter sequence for videos
     confidence = db.Column(db.Float, nullable=False)
     type = db.Column(db.String(10), nullable=False)  # 'image', 'video', or 'webcam'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    model_version = db.Column(db.String(64), nullable=True)
+
+    __table_args__ = (db.Index('ix_translation_user_created_at', 'user_id', 'created_at'),)
 
 # Favorites model
 class Favorite(db.Model):
@@ -132,28 +416,211 @@ class UsageStatistics(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # One row per user: the history writers of several processes upsert it on this key
+    __table_args__ = (db.Index('uq_usage_statistics_user_id', 'user_id', unique=True),)
+
+# Per-user, per-class prediction counters, maintained by the history writer
+class ClassUsage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    predicted_class = db.Column(db.String(10), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'predicted_class'),)
+
+# Per-user, per-day counters (UTC days) covering predictions and translations
+class DailyUsage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'day'),)
+
+# How many history rows point at each stored upload; `flask gc-uploads` deletes files nothing points at
+class StoredUpload(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(255), nullable=False, unique=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    last_referenced_at = db.Column(db.DateTime, nullable=True)
+
+def write_history(app, records):
+    """
+    Insert a batch of queued history rows and fold them into the usage aggregates
+
+    Args:
+        app: Application whose database and Services the rows belong to
+        records: List of (kind, row) pairs queued through its history_recorder
+    """
+    rows = {'prediction': [], 'translation': []}
+    deltas = UsageDeltas()
+    references = {}
+    for kind, row in records:
+        rows[kind].append(row)
+        if kind == 'prediction':
+            deltas.add(row['user_id'], row['timestamp'], row['confidence'], row['predicted_class'])
+            path = row['filename']
+        else:
+            deltas.add(row['user_id'], row['created_at'], row['confidence'])
+            path = row['image_path']
+        references[path] = references.get(path, 0) + 1
+
+    started = time.perf_counter()
+    # Runs on the recorder's thread, so the app is named explicitly rather than taken from a request
+    with app.app_context():
+        with db.engine.begin() as connection:
+            # executemany: one statement per table for the whole batch, committed in one transaction
+            if rows['prediction']:
+                connection.execute(Prediction.__table__.insert(), rows['prediction'])
+            if rows['translation']:
+                connection.execute(Translation.__table__.insert(), rows['translation'])
+            apply_deltas(connection, usage_tables(), deltas)
+            if upload_store:
+                apply_references(connection, StoredUpload.__table__, references)
+        stats_cache.discard(deltas.users)
+        metrics.observe('history_write_duration_seconds', time.perf_counter() - started)
+        for kind, kind_rows in rows.items():
+            if kind_rows:
+                metrics.inc('history_rows_total', {'kind': kind}, len(kind_rows))
+
+
+def usage_tables():
+    return {
+        'users': UsageStatistics.__table__,
+        'classes': ClassUsage.__table__,
+        'days': DailyUsage.__table__
+    }
+
+
+def record_prediction(filename, predicted_class, confidence, model_version=None):
+    """
+    Queue the current user's prediction for the history table
+
+    Args:
+        filename: Stored upload name
+        predicted_class: Predicted label
+        confidence: Probability of the predicted label
+        model_version: Version of the model that produced the prediction
+    """
+    history_recorder.record('prediction', {
+        'filename': filename,
+        'predicted_class': predicted_class,
+        'confidence': confidence,
+        'timestamp': datetime.utcnow(),
+        'user_id': current_user.id,
+        'model_version': model_version
+    })
+
+
+def history_query(user_id):
+    """
+    Select only the Prediction columns the history listings render
+
+    Args:
+        user_id: Owner of the rows
+
+    Returns:
+        Query yielding lightweight rows instead of full ORM objects
+    """
+    return db.session.query(
+        Prediction.id,
+        Prediction.filename,
+        Prediction.predicted_class,
+        Prediction.confidence,
+        Prediction.timestamp,
+        Prediction.model_version
+    ).filter(Prediction.user_id == user_id)
+
+
 # Helper function to check if file extension is allowed
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def allowed_video(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_VIDEO_EXTENSIONS']
+
+
+def load_identity(user_id):
+    row = db.session.query(User.id, User.username, User.email, User.password_hash).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return UserIdentity(row.id, row.username, row.email, credential_fingerprint(row.password_hash))
+
 
-# User loader callback for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(int(user_id), load_identity)
+
+
+@login_manager.request_loader
+def load_user_from_token(req):
+    # Only consulted when the request has no session cookie. The token names the user and a
+    # fingerprint of their password hash; a cached identity answers both, so a hit needs no query
+    scheme, _, token = req.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token_signer.verify(token, lambda user_id: user_cache.get(int(user_id), load_identity))
+    return None
+
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def forget_cached_user(mapper, connection, target):
+    # Profile edits and deletions must not be served stale from the cache
+    user_cache.invalidate(target.id)
+
+
+@main.before_app_request
+def start_request_timer():
+    if current_app.config['METRICS_ENABLED']:
+        g.timer = metrics.timer()
+
+@main.after_app_request
+def record_request_metrics(response):
+    timer = g.get('timer')
+    if timer is None:
+        return response
+    # The endpoint name, never the raw path, so 404 probes cannot blow up the label set
+    endpoint = request.endpoint or 'unmatched'
+    metrics.inc('http_requests_total', {'endpoint': endpoint, 'method': request.method,
+                                        'status': response.status_code})
+    metrics.observe('http_request_duration_seconds', timer.elapsed(), {'endpoint': endpoint})
+    if current_app.config['PROFILE_REQUESTS'] and request.headers.get('X-Profile'):
+        breakdown = timer.server_timing()
+        response.headers['Server-Timing'] = breakdown
+        current_app.logger.info('profile %s %s: %s', request.method, request.path, breakdown)
+    return response
+
+@main.teardown_app_request
+def count_request_exception(exception):
+    # Only exceptions no error handler turned into a response get here; no signals, so no blinker dependency
+    if exception is not None:
+        metrics.inc('http_exceptions_total', {'endpoint': request.endpoint or 'unmatched',
+                                              'exception': type(exception).__name__})
+
+
+@main.app_errorhandler(PoolBusyError)
+def inference_busy(e):
+    return jsonify({'error': 'Server is busy, please retry shortly'}), 503
+
+@main.app_errorhandler(InferenceTimeoutError)
+def inference_timeout(e):
+    return jsonify({'error': 'Prediction timed out'}), 504
 
 # Routes
-@app.route('/')
+@main.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/about')
+@main.route('/about')
 def about():
     return render_template('about.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@main.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
         username = request.form.get('username')
@@ -161,19 +628,29 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            valid, new_hash = password_hasher.verify(user.password_hash, password) if user else (False, None)
+        except HashingBusyError:
+            flash('Too many sign-ins right now. Please try again in a moment.')
+            return render_template('login.html'), 503, {'Retry-After': '1'}
+        
+        if valid:
+            if new_hash:
+                # Made with older cost parameters; replaced transparently
+                user.password_hash = new_hash
+                db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
-            return redirect(next_page or url_for('dashboard'))
+            return redirect(next_page or url_for('main.dashboard'))
         else:
             flash('Login failed. Please check your username and password.')
     
     return render_template('login.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
+@main.route('/signup', methods=['GET', 'POST'])
 def signup():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
         username = request.form.get('username')
@@ -183,52 +660,91 @@ def signup():
         
         if password != confirm_password:
             flash('Passwords do not match!')
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
         
         existing_user = User.query.filter_by(username=username).first()
         if existing_user:
             flash('Username already exists!')
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
             
         existing_email = User.query.filter_by(email=email).first()
         if existing_email:
             flash('Email already registered!')
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
+        
+        try:
+            password_hash = password_hasher.hash(password)
+        except HashingBusyError:
+            flash('Too many sign-ups right now. Please try again in a moment.')
+            return render_template('signup.html'), 503, {'Retry-After': '1'}
         
         new_user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hash
         )
         
         db.session.add(new_user)
         db.session.commit()
         
         flash('Account created successfully! Please log in.')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('signup.html')
 
-@app.route('/logout')
+@main.route('/logout')
 @login_required
 def logout():
+    user_cache.invalidate(current_user.id)
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/dashboard')
+@main.route('/dashboard')
 @login_required
 def dashboard():
-    predictions = Prediction.query.filter_by(user_id=current_user.id).order_by(Prediction.timestamp.desc()).limit(5).all()
+    # Read without flushing the history writer: predictions still queued (at most HISTORY_FLUSH_INTERVAL
+    # under normal load) appear on the next view, and the page never waits on other users' writes
+    predictions, _ = keyset_page(history_query(current_user.id), Prediction.timestamp, Prediction.id, limit=5)
     return render_template('dashboard.html', predictions=predictions)
 
-@app.route('/history')
+@main.route('/history')
 @login_required
 def view_history():
-    predictions = Prediction.query.filter_by(user_id=current_user.id).order_by(Prediction.timestamp.desc()).all()
-    return render_template('history.html', predictions=predictions)
+    # Not flushed either, for the same reason as the dashboard
+    predictions, next_cursor = keyset_page(
+        history_query(current_user.id), Prediction.timestamp, Prediction.id,
+        limit=current_app.config['HISTORY_PAGE_SIZE']
+    )
+    return render_template('history.html', predictions=predictions, next_cursor=next_cursor)
+
+@main.route('/api/history')
+@login_required
+def history_page():
+    # Infinite scroll on /history: each call returns the page after the given cursor
+    page_size = current_app.config['HISTORY_PAGE_SIZE']
+    limit = min(request.args.get('limit', page_size, type=int), page_size)
+    try:
+        predictions, next_cursor = keyset_page(
+            history_query(current_user.id), Prediction.timestamp, Prediction.id,
+            cursor=request.args.get('cursor'), limit=max(1, limit)
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({
+        'items': [{
+            'id': prediction.id,
+            'predicted_class': prediction.predicted_class,
+            'confidence': round(prediction.confidence * 100, 2),
+            'timestamp': prediction.timestamp.strftime('%Y-%m-%d %H:%M'),
+            'image_url': upload_url(prediction.filename),
+            'thumbnail_url': thumbnail_url(prediction.filename),
+            'model_version': prediction.model_version
+        } for prediction in predictions],
+        'next_cursor': next_cursor
+    })
 
 
-@app.route('/predict', methods=['POST'])
+@main.route('/predict', methods=['POST'])
 @login_required
 def predict():
     if 'file' not in request.files:
@@ -240,38 +756,31 @@ def predict():
         return jsonify({'error': 'No selected file'})
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
-        img = Image.open(file_path).resize((64, 64))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-
-        y_pred_probs = model.predict(img_array)
-        y_pred = np.argmax(y_pred_probs, axis=1)
-        predicted_class = class_labels[y_pred[0]]
-        confidence = float(y_pred_probs[0][y_pred[0]])
-
-        prediction = Prediction(
-            filename=filename,
-            predicted_class=predicted_class,
-            confidence=confidence,
-            user_id=current_user.id
-        )
-        db.session.add(prediction)
-        db.session.commit()
+        # Decoded straight from the request buffer; the upload never has to hit disk to be predicted
+        with stage('read'):
+            data = read_upload(file)
+        result, digest = predict_upload(data)
+        with stage('store'):
+            filename = store_upload(data, file.filename, digest)
+        predicted_class = result['predicted_class']
+        confidence = result['confidence']
 
-        return jsonify({
-            'predicted_class': predicted_class,
-            'confidence': confidence,
-            'file_path': f'/static/uploads/{filename}'
-        })
+        with stage('record'):
+            record_prediction(filename, predicted_class, confidence, result.model_version)
+
+        with stage('encode'):
+            return jsonify({
+                'predicted_class': predicted_class,
+                'confidence': confidence,
+                'top_k': [{'label': label, 'confidence': score} for label, score in result.top_k],
+                'file_path': upload_url(filename),
+                'model_version': result.model_version
+            })
 
     return jsonify({'error': 'File type not allowed'})
 
 
-@app.route('/predict_image', methods=['POST'])
+@main.route('/predict_image', methods=['POST'])
 @login_required
 def predict_image():
     if 'file' not in request.files:
@@ -279,41 +788,399 @@ def predict_image():
 
     file = request.files['file']
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(save_path)
-
-        # Preprocess and predict
-        img = Image.open(save_path).convert('RGB')
-        img = img.resize((64, 64))
-        img_array = np.array(img) / 255.0
-        img_array = img_array.reshape((1, 64, 64, 3))
-        predictions = model.predict(img_array)
-        confidence = np.max(predictions)
-        predicted_class = class_labels[np.argmax(predictions)]
-
-        # Save to DB
-        new_pred = Prediction(
-            filename=filename,
-            predicted_class=predicted_class,
-            confidence=float(confidence),
-            user_id=current_user.id
-        )
-        db.session.add(new_pred)
-        db.session.commit()
+        # Preprocess and predict from memory
+        with stage('read'):
+            data = read_upload(file)
+        result, digest = predict_upload(data)
+        with stage('store'):
+            filename = store_upload(data, file.filename, digest)
+        confidence = result['confidence']
+        predicted_class = result['predicted_class']
+
+        # Queued for the history writer; the response does not wait for the commit
+        with stage('record'):
+            record_prediction(filename, predicted_class, confidence, result.model_version)
+
+        with stage('encode'):
+            return jsonify({
+                'prediction': predicted_class,
+                'confidence': round(confidence * 100, 2),
+                'top_k': [{'label': label, 'confidence': round(score * 100, 2)} for label, score in result.top_k],
+                'image_url': upload_url(filename),
+                'model_version': result.model_version
+            })
+
+    return jsonify({'error': 'Invalid file type'}), 400
+
+
+@main.route('/predict_webcam', methods=['POST'])
+@login_required
+def predict_webcam():
+    if 'image' not in request.files:
+        return jsonify({'error': 'No image uploaded'}), 400
+
+    file = request.files['image']
+    if file and allowed_file(file.filename):
+        with stage('read'):
+            data = read_upload(file)
+        result, digest = predict_upload(data)
+        with stage('store'):
+            filename = store_upload(data, file.filename, digest)
+        confidence = result['confidence']
+        predicted_class = result['predicted_class']
+
+        with stage('record'):
+            record_prediction(filename, predicted_class, confidence, result.model_version)
+
+        with stage('encode'):
+            return jsonify({
+                'prediction': predicted_class,
+                'confidence': round(confidence * 100, 2),
+                'image_url': upload_url(filename),
+                'model_version': result.model_version
+            })
+
+    return jsonify({'error': 'Invalid file type'}), 400
+
+
+@main.route('/predict_raw', methods=['POST'])
+@login_required
+def predict_raw():
+    # Body: the frame downsampled on the browser canvas, width * height * 3 RGB bytes, no multipart
+    with stage('read'):
+        data = request.get_data(cache=False)
+    if len(data) != raw_frame_size():
+        width, height = MODEL_INPUT_SIZE
+        return jsonify({'error': f'Expected {raw_frame_size()} bytes of {width}x{height} RGB'}), 400
+
+    result, digest = predict_upload(data, raw=True)
+    with stage('store'):
+        # Kept as a PNG so the history pages can show it like any other upload
+        filename = store_upload(raw_to_png(data) if upload_store else data, 'webcam-frame.png')
+    confidence = result['confidence']
+    predicted_class = result['predicted_class']
+
+    with stage('record'):
+        record_prediction(filename, predicted_class, confidence, result.model_version)
 
+    with stage('encode'):
         return jsonify({
             'prediction': predicted_class,
             'confidence': round(confidence * 100, 2),
-            'image_url': url_for('static', filename='uploads/' + filename)
+            'image_url': upload_url(filename),
+            'model_version': result.model_version
+        })
+
+
+@main.route('/api/capture_config')
+def capture_config():
+    # Browsers read this once and shape every frame they send accordingly
+    width, height = MODEL_INPUT_SIZE
+    return jsonify({
+        'format': current_app.config['WEBCAM_UPLOAD_FORMAT'],
+        'width': width,
+        'height': height,
+        'jpeg_quality': current_app.config['WEBCAM_JPEG_QUALITY'],
+        'frame_interval_ms': current_app.config['WEBCAM_FRAME_INTERVAL_MS'],
+        'raw_url': url_for('main.predict_raw'),
+        'jpeg_url': url_for('main.predict_webcam')
+    })
+
+
+@main.route('/predict_video', methods=['POST'])
+@login_required
+def predict_video():
+    if 'video' not in request.files:
+        return jsonify({'error': 'No video uploaded'}), 400
+
+    file = request.files['video']
+    if file and allowed_video(file.filename):
+        # OpenCV needs a real file; it is created next to the uploads so storing it is a rename
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=current_app.config['UPLOAD_FOLDER'])
+        os.close(fd)
+        # Every frame of the video goes through the same model version, even across a swap
+        predictor = get_predictor()
+        try:
+            file.save(tmp_path)
+            frames = recognize_video(
+                tmp_path,
+                predict_batch=predictor.predict_batch,
+                class_labels=class_labels,
+                frames_per_second=current_app.config['FRAMES_PER_SECOND'],
+                max_duration=current_app.config['MAX_VIDEO_DURATION'],
+                batch_size=current_app.config['INFERENCE_MAX_BATCH_SIZE']
+            )
+            if upload_store:
+                filename = upload_store.store_file(tmp_path, file.filename.rsplit('.', 1)[1])
+            else:
+                filename = secure_filename(file.filename)
+        except ValueError:
+            return jsonify({'error': 'Could not read the uploaded video'}), 400
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if not frames:
+            return jsonify({'error': 'No frames could be read from the video'}), 400
+
+        segments = to_segments(frames)
+        text = ''.join(segment['letter'] for segment in segments)
+        confidence = sum(frame['confidence'] for frame in frames) / len(frames)
+
+        history_recorder.record('translation', {
+            'user_id': current_user.id,
+            'image_path': filename,
+            'prediction': text,
+            'confidence': confidence,
+            'type': 'video',
+            'created_at': datetime.utcnow(),
+            'model_version': predictor.model_version
+        })
+
+        return jsonify({
+            'prediction': text,
+            'confidence': round(confidence * 100, 2),
+            'video_predictions': [segment['letter'] for segment in segments],
+            'segments': segments,
+            'video_url': upload_url(filename),
+            'model_version': predictor.model_version
         })
 
     return jsonify({'error': 'Invalid file type'}), 400
 
 
-# Ensure the tables are created when the app starts
-with app.app_context():
-    db.create_all()
+@main.route('/predict_batch', methods=['POST'])
+@login_required
+def predict_batch():
+    # Bulk re-scoring: no upload is stored and no history row is written
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in ('jsonl', 'csv'):
+        return jsonify({'error': "format must be 'jsonl' or 'csv'"}), 400
+
+    # Zip limits are checked against each central directory before the response starts streaming
+    zip_limits = {
+        'max_members': current_app.config['BATCH_ZIP_MAX_MEMBERS'],
+        'max_member_bytes': current_app.config['BATCH_ZIP_MAX_MEMBER_BYTES'],
+        'max_total_bytes': current_app.config['BATCH_ZIP_MAX_TOTAL_BYTES']
+    }
+    for file in files:
+        if file.filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(file.stream) as archive:
+                    check_zip(archive, **zip_limits)
+            except zipfile.BadZipFile:
+                return jsonify({'error': f'{secure_filename(file.filename)} is not a valid zip archive'}), 400
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 413
+            file.stream.seek(0)
+
+    def sources():
+        for file in files:
+            if file.filename.lower().endswith('.zip'):
+                with zipfile.ZipFile(file.stream) as archive:
+                    yield from iter_zip(archive, prefix=secure_filename(file.filename) + ':', **zip_limits)
+            elif allowed_file(file.filename):
+                yield secure_filename(file.filename), read_upload(file)
+
+    records = predict_stream(
+        sources(),
+        predict_batch=get_predictor().predict_batch,
+        class_labels=class_labels,
+        batch_size=current_app.config['BATCH_PREDICT_SIZE']
+    )
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(iter_rows(records, fmt)), mimetype=mimetype)
+
+
+@sock.route('/ws/webcam', bp=main)
+def webcam_stream(ws):
+    # The session is checked once per connection instead of once per frame
+    if not current_user.is_authenticated:
+        ws.close(reason=1008, message='Login required')
+        return
+    decoder = SignStreamDecoder(
+        live_predictor,
+        class_labels,
+        smoothing=current_app.config['STREAM_SMOOTHING'],
+        window=current_app.config['STREAM_WINDOW'],
+        stable_frames=current_app.config['STREAM_STABLE_FRAMES'],
+        min_confidence=current_app.config['STREAM_MIN_CONFIDENCE'],
+        gap_frames=current_app.config['STREAM_GAP_FRAMES'],
+        diff_threshold=current_app.config['STREAM_DIFF_THRESHOLD']
+    )
+    # '?format=raw' connections send canvas-downsampled RGB bytes instead of encoded images
+    serve_webcam_stream(ws, decoder, raw_size=MODEL_INPUT_SIZE if request.args.get('format') == 'raw' else None)
+
+
+@main.route('/api/token', methods=['POST'])
+@login_required
+def issue_token():
+    # For scripts and devices posting frames: send as 'Authorization: Bearer <token>' instead of a session.
+    # Only a password (session) login may mint tokens, so a leaked token cannot renew itself
+    if '_user_id' not in session:
+        return jsonify({'error': 'Sign in with a password to issue an API token'}), 403
+    return jsonify({
+        'token': token_signer.issue(current_user),
+        'token_type': 'Bearer',
+        'expires_in': token_signer.max_age
+    })
+
+
+@main.route('/api/stats')
+@login_required
+def usage_stats():
+    # Reads at most one row per class and one per day, however long the history is. No flush: rows still
+    # queued show up after the writer's next batch, which also drops this user's cache entry, so a read
+    # never waits on other users' writes
+    stats = stats_cache.get(current_user.id)
+    if stats is None:
+        totals = UsageStatistics.query.filter_by(user_id=current_user.id).first()
+        classes = ClassUsage.query.filter_by(user_id=current_user.id).order_by(ClassUsage.count.desc()).all()
+        since = datetime.utcnow().date() - timedelta(days=current_app.config['STATS_DAYS'] - 1)
+        days = DailyUsage.query.filter(
+            DailyUsage.user_id == current_user.id, DailyUsage.day >= since
+        ).order_by(DailyUsage.day).all()
+
+        total = totals.translations_count if totals else 0
+        # Across single-image predictions; video translations have no class counter
+        confidence_sum = sum(usage.confidence_sum for usage in classes)
+        counted = sum(usage.count for usage in classes)
+        stats = {
+            'total': total,
+            'last_translation_at': totals.last_translation_at.isoformat() if totals and totals.last_translation_at else None,
+            'by_class': [{
+                'label': usage.predicted_class,
+                'count': usage.count,
+                'average_confidence': round(usage.confidence_sum / usage.count * 100, 2)
+            } for usage in classes],
+            'daily': [{'date': day.day.isoformat(), 'count': day.count} for day in days],
+            'average_confidence': round(confidence_sum / counted * 100, 2) if counted else None,
+            'days': current_app.config['STATS_DAYS']
+        }
+        stats_cache.put(current_user.id, stats)
+    return jsonify(stats)
+
+
+@main.cli.command('rebuild-stats')
+def rebuild_stats():
+    """Recompute usage statistics from the Prediction and Translation tables"""
+    with db.engine.begin() as connection:
+        counts = rebuild(connection, usage_tables(), Prediction.__table__, Translation.__table__)
+    print(f"Rebuilt usage statistics: {counts['users']} users, {counts['classes']} class counters, "
+          f"{counts['days']} daily counters")
+
+
+@main.route('/uploads/<path:filename>')
+def upload_file(filename):
+    if not upload_store:
+        abort(404)
+    response = send_from_directory(upload_store.upload_folder, filename,
+                                   max_age=current_app.config['UPLOAD_CACHE_MAX_AGE'])
+    # Content-addressed names change whenever the bytes do, so browsers never need to revalidate
+    response.cache_control.immutable = upload_store.is_content_addressed(filename)
+    return response
+
+
+@main.route('/thumbnails/<path:filename>')
+def upload_thumbnail(filename):
+    if not upload_store or safe_join(upload_store.upload_folder, filename) is None:
+        abort(404)
+    path = upload_store.thumbnail_for(filename)
+    if path is None:
+        abort(404)
+    response = send_file(path, mimetype='image/jpeg', max_age=current_app.config['UPLOAD_CACHE_MAX_AGE'])
+    response.cache_control.immutable = upload_store.is_content_addressed(filename)
+    return response
+
+
+@main.cli.command('gc-uploads')
+def gc_uploads():
+    """Recount upload references and delete stored uploads no history row points at"""
+    if not upload_store:
+        print('PERSIST_UPLOADS is off; nothing to collect')
+        return
+    history_recorder.flush()
+    before = upload_store.usage()
+    with db.engine.begin() as connection:
+        referenced = rebuild_references(
+            connection, StoredUpload.__table__, (Prediction.__table__.c.filename, Translation.__table__.c.image_path)
+        )
+    result = upload_store.collect_garbage(referenced, grace_seconds=current_app.config['UPLOAD_GC_GRACE'])
+    print(f"Removed {result['removed']} files ({result['bytes_freed'] / 1e6:.1f} MB) of "
+          f"{before['files'] + before['thumbnails']}; {len(referenced)} uploads still referenced")
+
+
+@main.route('/metrics')
+def metrics_endpoint():
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@main.route('/health/inference')
+def inference_health():
+    stats = inference_engine.stats()
+    if not current_app.config['INFERENCE_WORKERS']:
+        stats['model'] = model_registry.stats()
+    return jsonify(stats)
+
+
+@main.route('/health/auth')
+def auth_health():
+    return jsonify({'password_hasher': password_hasher.stats(), 'user_cache': user_cache.stats()})
+
+
+def require_model_admin():
+    # Model management is off unless a token is configured, and then only answers to that token
+    token = request.headers.get('X-Admin-Token', '')
+    admin_token = current_app.config['MODEL_ADMIN_TOKEN']
+    if not admin_token or not hmac.compare_digest(token, admin_token):
+        abort(404)
+    if current_app.config['INFERENCE_WORKERS']:
+        # Each worker process keeps only its own current version; replace the model file instead
+        response = jsonify({'error': 'Model management is only available with in-process inference'})
+        response.status_code = 409
+        abort(response)
+
+
+@main.route('/api/model/versions')
+def model_versions():
+    require_model_admin()
+    return jsonify({'versions': model_registry.versions(), **model_registry.stats()})
+
+
+@main.route('/api/model/reload', methods=['POST'])
+def model_reload():
+    # Loads MODEL_PATH now instead of waiting for the watcher; the current version serves until it is ready
+    require_model_admin()
+    try:
+        version = model_registry.reload()
+    except Exception as e:
+        return jsonify({'error': f'Could not load {os.path.basename(model_registry.model_path)}: {e}'}), 500
+    return jsonify({'active_version': version, 'versions': model_registry.versions()})
+
+
+@main.route('/api/model/rollback', methods=['POST'])
+def model_rollback():
+    # Body {"version": "..."} picks a loaded version; without one the previously loaded version is restored.
+    # The pin is written next to MODEL_PATH, so every process watching the file follows within
+    # MODEL_WATCH_INTERVAL and restarts keep it, until the file is replaced or /api/model/reload is called
+    require_model_admin()
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        version = model_registry.rollback(version)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'active_version': version, 'pinned_version': model_registry.stats()['pinned_version'],
+                    'versions': model_registry.versions()})
+
+
+# The WSGI entry point (app:app) and the application the benchmarks import
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run()
@@ -0,0 +1,107 @@
+"""
+Count the database queries an authenticated webcam frame costs on the request thread
+
+Frames are posted to /predict_webcam the way the browser's capture loop does, first
+with the user cache disabled (one User lookup per frame, as before), then with the
+cache enabled, then with a bearer token from /api/token instead of a session cookie
+(which must not be able to mint a further token).
+History rows are written by the background writer and are not counted.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_auth_queries --frames 200
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+def _frame_bytes():
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=200, help='Frames posted per mode')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_auth_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'auth.db')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['PERSIST_UPLOADS'] = 'false'
+
+    from sqlalchemy import event
+
+    import app as app_module
+    from utils.user_cache import UserCache
+
+    services = app_module.services(app_module.app)
+
+    request_thread = threading.get_ident()
+    queries = [0]
+
+    def count(*_):
+        if threading.get_ident() == request_thread:
+            queries[0] += 1
+
+    with app_module.app.app_context():
+        event.listen(app_module.db.engine, 'before_cursor_execute', count)
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=services.password_hasher.hash('Benchmark-1'))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+
+    session_client = app_module.app.test_client()
+    session_client.post('/login', data={'username': 'bench', 'password': 'Benchmark-1'})
+    token = session_client.post('/api/token').get_json()['token']
+    token_client = app_module.app.test_client()
+    failures = []
+    renewed = token_client.post('/api/token', headers={'Authorization': f'Bearer {token}'})
+    if renewed.status_code != 403:
+        failures.append(f'a bearer token minted another token (HTTP {renewed.status_code})')
+
+    frame = _frame_bytes()
+    cached_cache = services.user_cache
+    modes = [
+        ('session, no user cache', session_client, {}, UserCache(ttl_seconds=0)),
+        ('session, user cache', session_client, {}, cached_cache),
+        ('bearer token', token_client, {'Authorization': f'Bearer {token}'}, cached_cache),
+    ]
+
+    print(f"{'mode':<26}{'queries/frame':>15}{'ms/frame':>10}")
+    for label, client, headers, cache in modes:
+        services.user_cache = cache
+
+        def post():
+            response = client.post('/predict_webcam', headers=headers,
+                                   data={'image': (io.BytesIO(frame), 'frame.jpg')})
+            if response.status_code != 200:
+                raise RuntimeError(f'{label}: HTTP {response.status_code}')
+
+        post()  # loads the model and fills the caches outside the measurement
+        queries[0] = 0
+        started = time.perf_counter()
+        for _ in range(args.frames):
+            post()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0 / args.frames
+        per_frame = queries[0] / args.frames
+        print(f"{label:<26}{per_frame:>15.2f}{elapsed_ms:>10.2f}")
+        if cache is cached_cache and per_frame > 0:
+            failures.append(f'{label} still issues {per_frame:.2f} queries per frame')
+
+    services.history_recorder.close()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
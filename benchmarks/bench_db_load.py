@@ -0,0 +1,188 @@
+"""
+Load-test the database-bound routes with and without an engine connection pool
+
+Each configuration runs in a fresh interpreter (the app reads its settings at import)
+that seeds a user with a prediction history, serves the app on a threaded local server
+and hammers /dashboard, /api/history and /api/stats from concurrent clients.
+
+--database sqlite uses a throwaway SQLite file. --database postgres starts a local
+PostgreSQL stand-in through the optional `pgserver` package unless --database-url
+points at a real server (psycopg2 is needed either way).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_db_load --database sqlite --pool-sizes 0 10 --clients 16
+    python -m benchmarks.bench_db_load --database postgres --pool-sizes 0 10 --clients 16
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROUTES = ['/dashboard', '/api/history', '/api/stats']
+PASSWORD = 'Benchmark-1'
+
+
+def _seed(app_module, rows):
+    db = app_module.db
+    with app_module.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=app_module.password_hasher.hash(PASSWORD))
+        db.session.add(user)
+        db.session.commit()
+        start = datetime(2024, 1, 1)
+        labels = app_module.class_labels
+        app_module.write_history(app_module.app, [
+            ('prediction', {
+                'filename': f'{i:064x}.jpg',
+                'predicted_class': labels[i % len(labels)],
+                'confidence': 0.9,
+                'timestamp': start + timedelta(minutes=i),
+                'user_id': user.id
+            }) for i in range(rows)
+        ])
+
+
+def _login(port):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('POST', '/login', body=f'username=bench&password={PASSWORD}',
+                       headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = connection.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie')
+    if response.status != 302 or not cookie:
+        raise RuntimeError(f'login failed with HTTP {response.status}')
+    connection.close()
+    return cookie.split(';', 1)[0]
+
+
+def _client(port, cookie, count, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    for i in range(count):
+        started = time.perf_counter()
+        try:
+            connection.request('GET', ROUTES[i % len(ROUTES)], headers={'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port)
+            ok = False
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        if not ok:
+            errors.append(i)
+    connection.close()
+
+
+def run_child(clients, requests_per_client, rows):
+    """Runs inside the child interpreter configured through the environment"""
+    from werkzeug.serving import make_server
+
+    import app as app_module
+
+    services = app_module.services(app_module.app)
+
+    _seed(app_module, rows)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    cookie = _login(port)
+    latencies, errors = [], []
+    # One untimed round per route so template compilation and imports are not measured
+    _client(port, cookie, len(ROUTES), [], [])
+
+    threads = [threading.Thread(target=_client, args=(port, cookie, requests_per_client, latencies, errors))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    services.history_recorder.close()
+
+    latencies.sort()
+    print(json.dumps({
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[int(len(latencies) * 0.95)]
+    }))
+
+
+def _database_url(kind, workdir, explicit):
+    if explicit:
+        return explicit, None
+    if kind == 'sqlite':
+        return 'sqlite:///' + os.path.join(workdir, 'load.db'), None
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit('--database postgres needs --database-url or the pgserver package (pip install pgserver)')
+    server = pgserver.get_server(os.path.join(workdir, 'pgdata'), cleanup_mode='stop')
+    return server.get_uri(), server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database', choices=['sqlite', 'postgres'], default='sqlite')
+    parser.add_argument('--database-url', help='Use this database instead of a local stand-in (it is wiped)')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[0, 10],
+                        help='DB_POOL_SIZE values to compare; 0 opens a connection per checkout')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent keep-alive clients')
+    parser.add_argument('--requests', type=int, default=100, help='Requests per client')
+    parser.add_argument('--rows', type=int, default=5000, help='History rows seeded for the test user')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.clients, args.requests, args.rows)
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix='bench_db_load_')
+    database_url, server = _database_url(args.database, workdir, args.database_url)
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{args.database}: {args.clients} clients x {args.requests} requests over {', '.join(ROUTES)}")
+    print(f"{'pool size':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    failures = 0
+    for pool_size in args.pool_sizes:
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            DB_POOL_SIZE=str(pool_size),
+            DB_MAX_OVERFLOW=str(args.clients),
+            FLASK_CONFIG='production',
+            SECRET_KEY='benchmark',
+            STATS_CACHE_TTL='0',
+            PRELOAD_MODEL='false',
+            PERSIST_UPLOADS='false'
+        )
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_db_load', '--child', '--clients', str(args.clients),
+             '--requests', str(args.requests), '--rows', str(args.rows)],
+            cwd=repo_root, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        failures += result['errors']
+        print(f"{pool_size:>10}{result['rps']:>10.1f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['errors']:>8}")
+
+    if server is not None:
+        server.cleanup()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
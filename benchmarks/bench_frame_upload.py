@@ -0,0 +1,113 @@
+"""
+Compare webcam frame upload modes: full-size JPEG, canvas-downsampled JPEG and raw RGB
+
+Each mode posts --frames distinct synthetic frames through the Flask test client
+and reports the bytes uploaded per frame and the request latency (client-side
+encoding is not timed):
+  jpeg 1280x720   what camera.js captureAsBlob sent before (quality 0.95, /predict_webcam)
+  jpeg 640x480    the prediction page's 640x480 capture at quality 0.95
+  jpeg 64x64      downsampled on the canvas, quality 0.9 (/predict_webcam)
+  raw 64x64       downsampled on the canvas, 12288 RGB bytes (/predict_raw, no decoder)
+The browser's canvas downsampling is emulated with a Pillow resize. It also reports
+how often the raw path picks the same top class as the full-size upload.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_frame_upload --frames 100
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_suite import encode_jpeg, make_frame
+
+PASSWORD = 'Benchmark-1'
+
+
+def _canvas_downsample(pixels, size=(64, 64)):
+    return np.asarray(Image.fromarray(pixels).resize(size, Image.BILINEAR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100, help='Distinct frames posted per mode')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_frames_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'frames.db')
+    os.environ['PERSIST_UPLOADS'] = 'false'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    import app as app_module
+
+    services = app_module.services(app_module.app)
+
+    with app_module.app.app_context():
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=services.password_hasher.hash(PASSWORD))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': PASSWORD})
+
+    # Distinct frames so the prediction cache never answers
+    frames = [make_frame(1280, 720, seed=seed) for seed in range(args.frames)]
+
+    def jpeg(size, quality):
+        def encode(pixels):
+            if size != (1280, 720):
+                pixels = _canvas_downsample(pixels, size)
+            return encode_jpeg(pixels, quality=quality)
+        return encode, lambda data: client.post('/predict_webcam', data={'image': (io.BytesIO(data), 'frame.jpg')})
+
+    def raw_encode(pixels):
+        return _canvas_downsample(pixels).tobytes()
+
+    def raw_post(data):
+        return client.post('/predict_raw', data=data, headers={'Content-Type': 'application/octet-stream'})
+
+    modes = [
+        ('jpeg 1280x720', *jpeg((1280, 720), 95)),
+        ('jpeg 640x480', *jpeg((640, 480), 95)),
+        ('jpeg 64x64', *jpeg((64, 64), 90)),
+        ('raw 64x64', raw_encode, raw_post),
+    ]
+
+    raw_post(raw_encode(frames[0]))  # loads the model outside the measurement
+    print(f"{'mode':<16}{'KB/frame':>10}{'p50 ms':>9}{'p95 ms':>9}")
+    predictions = {}
+    failures = []
+    for label, encode, post in modes:
+        # Encoding happens in the browser; only the request is timed
+        payloads = [encode(pixels) for pixels in frames]
+        sizes, latencies, predicted = [len(data) for data in payloads], [], []
+        for data in payloads:
+            started = time.perf_counter()
+            response = post(data)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            if response.status_code != 200:
+                failures.append(f'{label}: HTTP {response.status_code}')
+                break
+            predicted.append(response.get_json()['prediction'])
+        predictions[label] = predicted
+        print(f"{label:<16}{np.mean(sizes) / 1024:>10.1f}{np.percentile(latencies, 50):>9.2f}"
+              f"{np.percentile(latencies, 95):>9.2f}")
+
+    reference, candidate = predictions['jpeg 1280x720'], predictions['raw 64x64']
+    if reference and len(reference) == len(candidate):
+        agreement = np.mean([a == b for a, b in zip(reference, candidate)])
+        print(f"raw 64x64 agrees with jpeg 1280x720 on {agreement:.0%} of frames")
+
+    services.history_recorder.close()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Seed a large prediction history and check that every history page stays within its time and memory budget
+
+A throwaway SQLite database gets one heavy user plus background users. Pages are
+read through the /history keyset query at several depths (first page, middle,
+last) and timed against the old load-everything query for reference.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_history_queries --rows 50000 --max-ms 20 --max-kb 512
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def seed(app_module, rows, other_users, other_rows):
+    db = app_module.db
+    with app_module.app.app_context():
+        users = [app_module.User(username=f'user{i}', email=f'user{i}@example.com', password_hash='-')
+                 for i in range(other_users + 1)]
+        db.session.add_all(users)
+        db.session.commit()
+        heavy_id = users[0].id
+
+        start = datetime(2024, 1, 1)
+        table = app_module.Prediction.__table__
+        chunk = []
+        for i in range(rows + other_users * other_rows):
+            user_id = heavy_id if i < rows else users[1 + (i - rows) % other_users].id
+            chunk.append({
+                'filename': f'{i:064x}.jpg',
+                'predicted_class': 'A',
+                'confidence': 0.9,
+                # Pairs of equal timestamps make sure ties are paged correctly
+                'timestamp': start + timedelta(seconds=i // 2),
+                'user_id': user_id
+            })
+            if len(chunk) == 5000:
+                db.session.execute(table.insert(), chunk)
+                chunk = []
+        if chunk:
+            db.session.execute(table.insert(), chunk)
+        db.session.commit()
+        return heavy_id
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed_ms, peak / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='History rows of the heavy user')
+    parser.add_argument('--other-users', type=int, default=20, help='Background users')
+    parser.add_argument('--other-rows', type=int, default=1000, help='History rows per background user')
+    parser.add_argument('--page-size', type=int, default=50, help='Rows per page')
+    parser.add_argument('--max-ms', type=float, default=20.0, help='Per-page query time budget')
+    parser.add_argument('--max-kb', type=float, default=512.0, help='Per-page peak Python allocation budget')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_history_')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(workdir, 'history.db')
+    os.environ['PRELOAD_MODEL'] = 'false'
+    import app as app_module
+    from utils.history_pages import keyset_page
+
+    heavy_id = seed(app_module, args.rows, args.other_users, args.other_rows)
+    Prediction = app_module.Prediction
+
+    with app_module.app.app_context():
+        def page(cursor):
+            return keyset_page(app_module.history_query(heavy_id), Prediction.timestamp, Prediction.id,
+                               cursor=cursor, limit=args.page_size)
+
+        # Walk every page once to collect cursors and check that no row is skipped or repeated
+        cursors, seen, cursor = [None], set(), None
+        while True:
+            rows, cursor = page(cursor)
+            seen.update(row.id for row in rows)
+            if cursor is None:
+                break
+            cursors.append(cursor)
+
+        samples = {
+            'first page': cursors[0],
+            'middle page': cursors[len(cursors) // 2],
+            'last page': cursors[-1]
+        }
+        print(f"{'query':<24}{'rows':>8}{'ms':>10}{'peak KB':>10}")
+        failures = []
+        for label, sample_cursor in samples.items():
+            page(sample_cursor)  # warm the page cache so the disk is not what gets measured
+            (rows, _), elapsed_ms, peak_kb = measure(lambda: page(sample_cursor))
+            print(f"{label:<24}{len(rows):>8}{elapsed_ms:>10.2f}{peak_kb:>10.1f}")
+            if elapsed_ms > args.max_ms:
+                failures.append(f'{label} took {elapsed_ms:.2f} ms')
+            if peak_kb > args.max_kb:
+                failures.append(f'{label} allocated {peak_kb:.1f} KB')
+
+        # Reference: what /history did before, every ORM object at once
+        def load_everything():
+            return Prediction.query.filter_by(user_id=heavy_id).order_by(Prediction.timestamp.desc()).all()
+        rows, elapsed_ms, peak_kb = measure(load_everything)
+        print(f"{'all rows (before)':<24}{len(rows):>8}{elapsed_ms:>10.2f}{peak_kb:>10.1f}")
+
+        plan = app_module.db.session.execute(app_module.db.text(
+            'EXPLAIN QUERY PLAN SELECT id FROM prediction WHERE user_id = :user_id '
+            'ORDER BY timestamp DESC, id DESC LIMIT 51'
+        ), {'user_id': heavy_id}).fetchall()
+        plan_text = ' '.join(str(row[-1]) for row in plan)
+        print(f"query plan: {plan_text}")
+
+    if len(seen) != args.rows:
+        failures.append(f'pagination returned {len(seen)} distinct rows, expected {args.rows}')
+    if 'ix_prediction_user_timestamp' not in plan_text:
+        failures.append('history query does not use ix_prediction_user_timestamp')
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
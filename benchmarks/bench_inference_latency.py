@@ -0,0 +1,62 @@
+"""
+Compare single-image latency of model.predict() against the compiled KerasBackend
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference_latency --iterations 200
+"""
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from config import Config
+from utils.backends import KerasBackend
+
+
+def time_calls(fn, img_array, iterations):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(img_array)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.array(latencies)
+
+
+def report(name, latencies):
+    print(f"{name:<16} median {np.median(latencies):8.3f} ms   "
+          f"p95 {np.percentile(latencies, 95):8.3f} ms   "
+          f"mean {latencies.mean():8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=Config.MODEL_PATH, help='Path to the Keras model')
+    parser.add_argument('--iterations', type=int, default=200, help='Timed calls per path')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed calls per path')
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    backend = KerasBackend(model=model)
+    img_array = np.random.rand(1, 64, 64, 3).astype(np.float32)
+
+    paths = [
+        ('model.predict', lambda x: model.predict(x, verbose=0)),
+        ('KerasBackend', backend.predict),
+    ]
+    for _, fn in paths:
+        for _ in range(args.warmup):
+            fn(img_array)
+
+    results = {}
+    for name, fn in paths:
+        results[name] = time_calls(fn, img_array, args.iterations)
+        report(name, results[name])
+
+    speedup = np.median(results['model.predict']) / np.median(results['KerasBackend'])
+    print(f"Median speedup: {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
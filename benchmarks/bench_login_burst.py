@@ -0,0 +1,125 @@
+"""
+Measure webcam-frame latency while a burst of logins is being verified
+
+A logged-in client posts frames to /predict_webcam while --logins concurrent clients
+post to /login. The burst runs once with hashing effectively unbounded (one hashing
+thread per login, nothing rejected) and once with the configured PasswordHasher limits,
+reporting frame latency and how many logins were answered with 503.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_login_burst --logins 32 --frames 100
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+PASSWORD = 'Benchmark-1'
+
+
+def _frame_bytes():
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=32, help='Concurrent logins in the burst')
+    parser.add_argument('--frames', type=int, default=100, help='Frames posted during each burst')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_login_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'login.db')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['PERSIST_UPLOADS'] = 'false'
+
+    import app as app_module
+    from utils.passwords import PasswordHasher
+
+    services = app_module.services(app_module.app)
+
+    configured = services.password_hasher
+    with app_module.app.app_context():
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=configured.hash(PASSWORD))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+
+    frame_client = app_module.app.test_client()
+    frame_client.post('/login', data={'username': 'bench', 'password': PASSWORD})
+    frame = _frame_bytes()
+
+    def post_frame():
+        response = frame_client.post('/predict_webcam', data={'image': (io.BytesIO(frame), 'frame.jpg')})
+        if response.status_code != 200:
+            raise RuntimeError(f'/predict_webcam returned HTTP {response.status_code}')
+
+    post_frame()  # loads the model outside the measurement
+    idle = []
+    for _ in range(args.frames):
+        started = time.perf_counter()
+        post_frame()
+        idle.append((time.perf_counter() - started) * 1000.0)
+
+    modes = [
+        ('unbounded', PasswordHasher(configured.method, configured.salt_length,
+                                     max_workers=args.logins, max_pending=args.logins)),
+        ('bounded', configured),
+    ]
+    print(f"{'mode':<12}{'workers':>8}{'p50 ms':>9}{'p95 ms':>9}{'logins ok':>11}{'503s':>6}")
+    print(f"{'no logins':<12}{'-':>8}{_percentile(idle, 0.5):>9.2f}{_percentile(idle, 0.95):>9.2f}"
+          f"{'-':>11}{'-':>6}")
+
+    failures = []
+    for label, hasher in modes:
+        services.password_hasher = hasher
+        statuses = []
+        start = threading.Barrier(args.logins + 1)
+
+        def login():
+            client = app_module.app.test_client()
+            start.wait()
+            statuses.append(client.post('/login', data={'username': 'bench', 'password': PASSWORD}).status_code)
+
+        threads = [threading.Thread(target=login) for _ in range(args.logins)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        latencies = []
+        for _ in range(args.frames):
+            started = time.perf_counter()
+            post_frame()
+            latencies.append((time.perf_counter() - started) * 1000.0)
+        for thread in threads:
+            thread.join()
+
+        accepted = statuses.count(302)
+        rejected = statuses.count(503)
+        print(f"{label:<12}{hasher.max_workers:>8}{_percentile(latencies, 0.5):>9.2f}"
+              f"{_percentile(latencies, 0.95):>9.2f}{accepted:>11}{rejected:>6}")
+        if accepted + rejected != len(statuses):
+            failures.append(f'{label}: unexpected login statuses {sorted(set(statuses))}')
+        if hasher is not configured:
+            hasher.close()
+
+    services.password_hasher = configured
+    services.history_recorder.close()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Replace the model file under load and check the swap costs no failed or stalled requests
+
+--clients threads post distinct synthetic JPEGs to /predict for --seconds. Partway
+through, a freshly saved stand-in model is moved over MODEL_PATH, as a deploy would;
+the registry's watcher loads and warms it in the background and swaps it in. The run
+reports request latency before, during and after the swap, the model versions the
+responses name, and that the new version is recorded in the history table. It then
+rolls back through /api/model/rollback and checks the old version answers again, in
+this process and in a freshly started registry that only sees the pin file.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_model_reload --clients 4 --seconds 20
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_suite import build_standin_model, encode_jpeg, make_frame
+
+PASSWORD = 'Benchmark-1'
+ADMIN_TOKEN = 'bench-admin'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=4, help='Concurrent /predict clients')
+    parser.add_argument('--seconds', type=float, default=20.0, help='Length of the run')
+    parser.add_argument('--watch-interval', type=float, default=0.5, help='MODEL_WATCH_INTERVAL for the run')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_reload_')
+    model_path = build_standin_model(os.path.join(workdir, 'model.keras'))
+    os.environ['MODEL_PATH'] = model_path
+    os.environ['MODEL_WATCH_INTERVAL'] = str(args.watch_interval)
+    os.environ['MODEL_ADMIN_TOKEN'] = ADMIN_TOKEN
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'reload.db')
+    os.environ['PERSIST_UPLOADS'] = 'false'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    import app as app_module
+    from utils.model_registry import ModelRegistry
+
+    services = app_module.services(app_module.app)
+
+    with app_module.app.app_context():
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=services.password_hasher.hash(PASSWORD))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+    clients = []
+    for _ in range(args.clients):
+        client = app_module.app.test_client()
+        client.post('/login', data={'username': 'bench', 'password': PASSWORD})
+        clients.append(client)
+
+    frame = encode_jpeg(make_frame(320, 240))
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+
+    def post(client):
+        # Bytes after the JPEG end marker change the content hash, so the prediction cache never answers
+        with counter_lock:
+            n = next(counter)
+        response = client.post('/predict', data={'file': (io.BytesIO(frame + n.to_bytes(8, 'little')), 'f.jpg')})
+        body = response.get_json(silent=True) or {}
+        return response.status_code == 200 and 'error' not in body, body.get('model_version')
+
+    ok, old_version = post(clients[0])
+    if not ok:
+        raise RuntimeError('/predict failed; check the model and labels')
+
+    samples = []  # (started, latency ms, ok, version)
+    samples_lock = threading.Lock()
+    stopping = threading.Event()
+
+    def run(client):
+        while not stopping.is_set():
+            started = time.perf_counter()
+            ok, version = post(client)
+            with samples_lock:
+                samples.append((started, (time.perf_counter() - started) * 1000.0, ok, version))
+
+    threads = [threading.Thread(target=run, args=(client,)) for client in clients]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Written elsewhere and moved into place, so the watcher never sees a half-written file
+    time.sleep(args.seconds / 3)
+    staged = build_standin_model(os.path.join(workdir, 'staged.keras'))
+    replaced_at = time.perf_counter()
+    os.replace(staged, model_path)
+    while services.model_registry.stats()['active_version'] == old_version:
+        if time.perf_counter() - replaced_at > args.seconds:
+            break
+        time.sleep(0.05)
+    swapped_at = time.perf_counter()
+
+    time.sleep(max(0.0, began + args.seconds - time.perf_counter()))
+    stopping.set()
+    for thread in threads:
+        thread.join()
+
+    new_version = services.model_registry.stats()['active_version']
+    print(f"old version {old_version}, new version {new_version}; "
+          f"swap took {swapped_at - replaced_at:.2f} s after the file was replaced")
+    print(f"{'phase':<10}{'requests':>10}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}  versions")
+    failures = []
+    phases = [('before', began, replaced_at), ('loading', replaced_at, swapped_at), ('after', swapped_at, float('inf'))]
+    for label, start, end in phases:
+        phase = [sample for sample in samples if start <= sample[0] < end]
+        if not phase:
+            print(f"{label:<10}{0:>10}")
+            continue
+        latencies = np.array([sample[1] for sample in phase])
+        errors = sum(1 for sample in phase if not sample[2])
+        versions = sorted({sample[3] for sample in phase if sample[3]})
+        print(f"{label:<10}{len(phase):>10}{errors:>8}{np.percentile(latencies, 50):>9.2f}"
+              f"{np.percentile(latencies, 95):>9.2f}{latencies.max():>9.2f}  {', '.join(versions)}")
+        if errors:
+            failures.append(f'{errors} failed requests while {label}')
+
+    if new_version == old_version:
+        failures.append('the new model file was never swapped in')
+
+    services.history_recorder.flush()
+    with app_module.app.app_context():
+        recorded = dict(app_module.db.session.query(
+            app_module.Prediction.model_version, app_module.db.func.count()
+        ).group_by(app_module.Prediction.model_version).all())
+    print(f"history rows per model version: {recorded}")
+    if new_version not in recorded:
+        failures.append('no history row records the new version')
+
+    headers = {'X-Admin-Token': ADMIN_TOKEN}
+    rolled_back = clients[0].post('/api/model/rollback', headers=headers).get_json()
+    ok, version = post(clients[0])
+    print(f"after rollback: active {rolled_back.get('active_version')}, /predict answered with {version}")
+    if version != old_version:
+        failures.append(f'rollback did not restore {old_version}')
+    if rolled_back.get('pinned_version') != old_version:
+        failures.append('the rollback was not pinned for other processes')
+
+    # Stands in for another worker process, or this one after a restart
+    restarted = ModelRegistry(model_path)
+    print(f"a registry started after the rollback serves {restarted.model_version}")
+    if restarted.model_version != old_version:
+        failures.append('a newly started process ignored the rollback pin')
+
+    services.model_registry.close()
+    services.history_recorder.close()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
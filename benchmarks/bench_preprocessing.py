@@ -0,0 +1,76 @@
+"""
+Compare upload preprocessing before and after draft decoding across typical input resolutions
+
+Each input is a synthetic JPEG or PNG held in memory, so only decode, resize and
+normalisation are timed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_preprocessing --iterations 50
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from utils.preprocessing import load_image_tensor
+
+# Webcam frames from static/js/camera.js and common phone photo sizes
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (4032, 3024)]
+
+
+def make_image(width, height, fmt):
+    """Encode a smooth synthetic image so JPEG sizes resemble real photos"""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([np.broadcast_to(x, (height, width)),
+                       np.broadcast_to(y, (height, width)),
+                       (x + y) / 2], axis=-1).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt, quality=90)
+    return buffer.getvalue()
+
+
+def baseline(data):
+    # What the routes did before: full decode, RGB convert, resize, float64 divide
+    img = Image.open(io.BytesIO(data)).convert('RGB').resize((64, 64))
+    return np.array(img) / 255.0
+
+
+def time_calls(fn, data, iterations):
+    """Return per-call latencies in milliseconds"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(data)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per input')
+    args = parser.parse_args()
+
+    out = np.empty((64, 64, 3), dtype=np.float32)
+    paths = [
+        ('baseline', baseline),
+        ('preprocessing', lambda data: load_image_tensor(data, out=out)),
+    ]
+
+    print(f"{'input':<18}{'baseline ms':>14}{'new ms':>10}{'speedup':>10}")
+    for fmt in ('JPEG', 'PNG'):
+        for width, height in RESOLUTIONS:
+            data = make_image(width, height, fmt)
+            medians = {}
+            for name, fn in paths:
+                fn(data)
+                medians[name] = np.median(time_calls(fn, data, args.iterations))
+            label = f"{fmt} {width}x{height}"
+            print(f"{label:<18}{medians['baseline']:>14.3f}{medians['preprocessing']:>10.3f}"
+                  f"{medians['baseline'] / medians['preprocessing']:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure import time and RSS of the web tier and fail when it exceeds its budget
+
+The app is imported in a fresh interpreter with an in-memory database, exactly as a
+web worker or migration script would, and must not pull in TensorFlow or the model.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --max-seconds 2.0 --max-rss-mb 150
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Executed in the child interpreter; prints one JSON line with the measurements
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'import_seconds': elapsed,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    'tensorflow_imported': 'tensorflow' in sys.modules,
+    'model_loaded': app.services(app.app).model_registry.loaded
+}))
+"""
+
+
+def measure(repo_root):
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI='sqlite://', PRELOAD_MODEL='false')
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE],
+        cwd=repo_root, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-seconds', type=float, default=2.0, help='Import time budget')
+    parser.add_argument('--max-rss-mb', type=float, default=150.0, help='Peak RSS budget')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to measure')
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = [measure(repo_root) for _ in range(args.runs)]
+    import_seconds = min(run['import_seconds'] for run in runs)
+    peak_rss_mb = max(run['peak_rss_mb'] for run in runs)
+
+    print(f"import app: {import_seconds:.3f} s (budget {args.max_seconds:.3f} s), "
+          f"peak RSS {peak_rss_mb:.1f} MB (budget {args.max_rss_mb:.1f} MB)")
+
+    failures = []
+    if import_seconds > args.max_seconds:
+        failures.append('import time over budget')
+    if peak_rss_mb > args.max_rss_mb:
+        failures.append('RSS over budget')
+    if any(run['tensorflow_imported'] for run in runs):
+        failures.append('TensorFlow was imported by the web tier')
+    if any(run['model_loaded'] for run in runs):
+        failures.append('model was loaded at import time')
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Offline benchmark suite: ISLModelPredictor micro-latency and end-to-end /predict throughput
+
+Everything runs without network access or the trained weights. Images are synthetic
+JPEGs at several resolutions, and unless --model is given the model is a small
+stand-in with the same 64x64x3 input and 35-class softmax output as
+models/isl_rnn_model.keras, so numbers measure the code path, not the network.
+
+Two groups are measured:
+  predictor  ISLModelPredictor.predict (image file) and predict_from_array (BGR frame)
+             at each resolution, one call at a time
+  endpoint   POST /predict through the Flask test client from 1..N concurrent clients;
+             every request carries distinct bytes, so the prediction cache never answers
+
+Results are written as JSON with --output. Passing --baseline compares against an
+earlier report and exits with status 1 when a median latency grows, or a throughput
+drops, by more than --tolerance. Tail latencies are reported but not gated; they are
+too noisy at these sample sizes. Baselines are machine-specific: record one on the
+machine that will run the comparison.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite --output bench_report.json
+    python -m benchmarks.bench_suite --baseline bench_report.json --tolerance 0.2
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+RESOLUTIONS = [(64, 64), (320, 240), (640, 480), (1280, 720)]
+NUM_CLASSES = 35
+PASSWORD = 'Benchmark-1'
+# Metrics stable enough between identical runs to fail a comparison on
+GATED_METRICS = ('p50_ms', 'rps')
+
+
+def build_standin_model(path):
+    """
+    Save a tiny Keras model shaped like the production one
+
+    Args:
+        path: Destination .keras file
+
+    Returns:
+        path
+    """
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(64, 64, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(NUM_CLASSES, activation='softmax')
+    ])
+    model.save(path)
+    return path
+
+
+def make_frame(width, height, seed=0):
+    """Smooth synthetic RGB frame; JPEG sizes resemble camera frames rather than noise"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 255, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+    return np.asarray(Image.fromarray(coarse).resize((width, height), Image.BILINEAR))
+
+
+def encode_jpeg(pixels, quality=90):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def summarize(latencies_ms):
+    latencies = np.asarray(latencies_ms)
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'mean_ms': round(float(latencies.mean()), 3)
+    }
+
+
+def time_calls(fn, iterations, warmup=3):
+    """Return per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies
+
+
+def bench_predictor(model_path, iterations, workdir):
+    from utils.model_utils import ISLModelPredictor
+
+    predictor = ISLModelPredictor(model_path)
+    results = {}
+    for width, height in RESOLUTIONS:
+        pixels = make_frame(width, height)
+        image_path = os.path.join(workdir, f'frame_{width}x{height}.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(encode_jpeg(pixels))
+        bgr = np.ascontiguousarray(pixels[:, :, ::-1])
+
+        results[f'predictor.predict.{width}x{height}'] = summarize(
+            time_calls(lambda: predictor.predict(image_path), iterations))
+        results[f'predictor.predict_from_array.{width}x{height}'] = summarize(
+            time_calls(lambda: predictor.predict_from_array(bgr), iterations))
+    return results
+
+
+def bench_endpoint(app_module, resolution, client_counts, requests_per_client):
+    with app_module.app.app_context():
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=app_module.password_hasher.hash(PASSWORD))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+
+    frame = encode_jpeg(make_frame(*resolution))
+    clients = []
+    for _ in range(max(client_counts)):
+        client = app_module.app.test_client()
+        client.post('/login', data={'username': 'bench', 'password': PASSWORD})
+        clients.append(client)
+
+    counter = iter(range(10 ** 9))
+    counter_lock = threading.Lock()
+
+    def unique_frame():
+        # Bytes after the JPEG end marker are ignored by decoders but change the content hash
+        with counter_lock:
+            n = next(counter)
+        return frame + n.to_bytes(8, 'little')
+
+    def post(client):
+        response = client.post('/predict', data={'file': (io.BytesIO(unique_frame()), 'frame.jpg')})
+        return response.status_code == 200 and 'error' not in response.get_json()
+
+    if not post(clients[0]):
+        raise RuntimeError('/predict failed; check the model and labels')
+
+    results = {}
+    for count in client_counts:
+        latencies, errors = [], []
+
+        def run(client):
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                ok = post(client)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                if not ok:
+                    errors.append(1)
+
+        threads = [threading.Thread(target=run, args=(client,)) for client in clients[:count]]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = summarize(latencies)
+        result['rps'] = round(len(latencies) / elapsed, 2)
+        result['errors'] = len(errors)
+        results[f'endpoint.predict.{resolution[0]}x{resolution[1]}.c{count}'] = result
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms=0.25):
+    """
+    Compare a report against a baseline report
+
+    Args:
+        results: 'results' mapping of the current run
+        baseline: 'results' mapping of the baseline run
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+        min_delta_ms: Latency changes smaller than this never count as regressions
+
+    Returns:
+        List of (benchmark, metric, baseline value, current value, relative change, regressed) tuples
+    """
+    rows = []
+    for name, metrics in sorted(results.items()):
+        for metric, value in sorted(metrics.items()):
+            base = baseline.get(name, {}).get(metric)
+            if base is None or metric == 'errors' or not base:
+                continue
+            change = (value - base) / base
+            if metric not in GATED_METRICS:
+                regressed = False
+            elif metric == 'rps':
+                regressed = change < -tolerance
+            else:
+                regressed = change > tolerance and value - base >= min_delta_ms
+            rows.append((name, metric, base, value, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', help='Model file to use instead of the generated stand-in')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed predictor calls per resolution')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16], help='Concurrent /predict clients')
+    parser.add_argument('--requests', type=int, default=25, help='Requests per client')
+    parser.add_argument('--resolution', default='640x480', help='WIDTHxHEIGHT of the frames posted to /predict')
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.25,
+                        help='Ignore latency regressions smaller than this many milliseconds')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    model_path = args.model or build_standin_model(os.path.join(workdir, 'standin.keras'))
+    resolution = tuple(int(v) for v in args.resolution.lower().split('x'))
+
+    # The app reads its settings at import
+    os.environ['MODEL_PATH'] = model_path
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'suite.db')
+    os.environ['PERSIST_UPLOADS'] = 'false'
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+    results = bench_predictor(model_path, args.iterations, workdir)
+
+    import app as app_module
+
+    services = app_module.services(app_module.app)
+
+    results.update(bench_endpoint(app_module, resolution, sorted(set(args.clients)), args.requests))
+    services.history_recorder.close()
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': 'stand-in' if not args.model else os.path.basename(args.model),
+            'iterations': args.iterations,
+            'requests_per_client': args.requests
+        },
+        'results': results
+    }
+
+    print(f"{'benchmark':<44}{'p50 ms':>9}{'p95 ms':>9}{'req/s':>9}")
+    for name, metrics in results.items():
+        rps = f"{metrics['rps']:>9.1f}" if 'rps' in metrics else f"{'':>9}"
+        print(f"{name:<44}{metrics['p50_ms']:>9.2f}{metrics['p95_ms']:>9.2f}{rps}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    failures = [f"{name}: {metrics['errors']} failed requests" for name, metrics in results.items()
+                if metrics.get('errors')]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('model') != report['meta']['model']:
+            print(f"warning: baseline used model {baseline['meta'].get('model')!r}")
+        print(f"\n{'benchmark':<44}{'metric':>8}{'baseline':>10}{'current':>10}{'change':>9}")
+        rows = compare(results, baseline['results'], args.tolerance, args.min_delta_ms)
+        for name, metric, base, value, change, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{name:<44}{metric:>8}{base:>10.2f}{value:>10.2f}{change:>+9.1%}{flag}")
+            if regressed:
+                failures.append(f'{name} {metric} {change:+.1%}')
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
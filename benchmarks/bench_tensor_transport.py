@@ -0,0 +1,93 @@
+"""
+Compare pickled multiprocessing queues against shared memory slots for sending tensors to a worker
+
+A consumer process receives each 64x64x3 float32 tensor, copies it into a batch buffer
+the way an inference worker does, and acknowledges it. The producer paces tensors at
+each target rate and records the round-trip latency; a rate of 0 sends as fast as possible.
+Only the tensor ring ships: webcam and video frames are resized to the model input
+before they reach InferenceWorkerPool, so no full-size frame crosses the process boundary.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tensor_transport --rates 15 30 60 120 0 --frames 300
+"""
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from utils.shm_ring import SharedSlotRing
+
+# The payloads InferenceWorkerPool sends through its 'tensor' ring
+PAYLOADS = {
+    'tensor 64x64x3 f32': ((64, 64, 3), np.float32),
+}
+
+
+def _consumer(requests, responses, ring_spec, shape, dtype):
+    ring = SharedSlotRing(**ring_spec) if ring_spec else None
+    batch = np.empty(shape, dtype=dtype)
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        kind, payload = item
+        batch[...] = ring.view(payload) if kind == 'shm' else payload
+        responses.put(payload if kind == 'shm' else None)
+
+
+def run(transport, shape, dtype, rate, frames, slots=8):
+    context = multiprocessing.get_context('spawn')
+    requests, responses = context.Queue(), context.Queue()
+    ring = SharedSlotRing(slots, shape, dtype) if transport == 'shm' else None
+    consumer = context.Process(
+        target=_consumer, args=(requests, responses, ring.describe() if ring else None, shape, dtype)
+    )
+    consumer.start()
+
+    frame = np.random.randint(0, 255, size=shape).astype(dtype)
+    interval = 1.0 / rate if rate else 0.0
+    latencies = []
+    try:
+        # One untimed round trip so process start-up is not measured
+        for timed in [False] + [True] * frames:
+            start = time.perf_counter()
+            if ring is not None:
+                slot = ring.acquire()
+                ring.view(slot)[...] = frame
+                requests.put(('shm', slot))
+                ring.release(responses.get())
+            else:
+                requests.put(('pickle', frame))
+                responses.get()
+            elapsed = time.perf_counter() - start
+            if timed:
+                latencies.append(elapsed * 1000.0)
+            if interval > elapsed:
+                time.sleep(interval - elapsed)
+    finally:
+        requests.put(None)
+        consumer.join()
+        if ring is not None:
+            ring.close()
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rates', type=float, nargs='+', default=[15, 30, 60, 120, 0],
+                        help='Frames per second to send; 0 means unpaced')
+    parser.add_argument('--frames', type=int, default=300, help='Timed frames per run')
+    args = parser.parse_args()
+
+    print(f"{'payload':<22}{'fps':>6}{'transport':>10}{'median ms':>11}{'p95 ms':>9}")
+    for label, (shape, dtype) in PAYLOADS.items():
+        for rate in args.rates:
+            for transport in ('pickle', 'shm'):
+                latencies = run(transport, shape, dtype, rate, args.frames)
+                print(f"{label:<22}{(rate or 'max'):>6}{transport:>10}"
+                      f"{np.median(latencies):>11.3f}{np.percentile(latencies, 95):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Measure /history page weight and upload disk use with thumbnails and garbage collection
+
+Posts --uploads webcam-sized frames (drawn from --distinct different images, so
+repeats are deduplicated) through /predict_image, then compares the image bytes a
+browser downloads for /history and /dashboard when they show full-size originals
+versus thumbnails. Finally it deletes half of the history rows and runs
+`flask gc-uploads` to show the disk space handed back.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_upload_storage --uploads 200 --distinct 50
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+
+def _image_bytes(seed, size=(640, 480)):
+    # Smoothed noise compresses like a camera frame rather than like pure noise
+    pixels = np.random.default_rng(seed).integers(0, 255, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize(size, Image.BILINEAR).filter(ImageFilter.GaussianBlur(2))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _page_image_bytes(client, path, originals):
+    html = client.get(path).get_data(as_text=True)
+    total = 0
+    for src in re.findall(r'<img src="(/(?:thumbnails|uploads)/[^"]+)"', html):
+        if originals:
+            src = src.replace('/thumbnails/', '/uploads/', 1)
+        total += len(client.get(src).get_data())
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=200, help='Images posted')
+    parser.add_argument('--distinct', type=int, default=50, help='Different images among them')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_uploads_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'uploads.db')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['PERSIST_UPLOADS'] = 'true'
+    os.environ['UPLOAD_GC_GRACE'] = '0'
+
+    import app as app_module
+
+    services = app_module.services(app_module.app)
+
+    store = services.upload_store
+    store.upload_folder = os.path.join(workdir, 'uploads')
+    os.makedirs(store.upload_folder)
+
+    with app_module.app.app_context():
+        user = app_module.User(username='bench', email='bench@example.com',
+                               password_hash=services.password_hasher.hash('Benchmark-1'))
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'Benchmark-1'})
+
+    images = [_image_bytes(seed) for seed in range(args.distinct)]
+    posted = 0
+    for i in range(args.uploads):
+        data = images[i % len(images)]
+        posted += len(data)
+        response = client.post('/predict_image', data={'file': (io.BytesIO(data), f'frame{i}.jpg')})
+        if response.status_code != 200:
+            raise RuntimeError(f'/predict_image returned HTTP {response.status_code}')
+    store.close()
+    services.history_recorder.flush()
+
+    usage = store.usage()
+    print(f"uploads posted: {args.uploads} ({posted / 1e6:.1f} MB), stored: {usage['files']} files "
+          f"({usage['bytes'] / 1e6:.1f} MB) + {usage['thumbnails']} thumbnails ({usage['thumbnail_bytes'] / 1e6:.2f} MB)")
+
+    print(f"{'page':<12}{'originals KB':>14}{'thumbnails KB':>15}")
+    failures = []
+    for path in ('/history', '/dashboard'):
+        full = _page_image_bytes(client, path, originals=True)
+        thumbs = _page_image_bytes(client, path, originals=False)
+        print(f"{path:<12}{full / 1e3:>14.1f}{thumbs / 1e3:>15.1f}")
+        if thumbs >= full:
+            failures.append(f'{path} is not lighter with thumbnails')
+
+    cached = client.get(re.search(r'<img src="(/thumbnails/[^"]+)"', client.get('/history').get_data(as_text=True)).group(1))
+    print(f"thumbnail Cache-Control: {cached.headers.get('Cache-Control')}")
+
+    # Drop the older half of the history, as a retention policy would, and collect the orphans
+    with app_module.app.app_context():
+        keep = {image for image in images[len(images) // 2:]}
+        doomed = [app_module.UploadStore.filename_for(image, 'jpg') for image in images if image not in keep]
+        app_module.Prediction.query.filter(app_module.Prediction.filename.in_(doomed)).delete(synchronize_session=False)
+        app_module.db.session.commit()
+    result = app_module.app.test_cli_runner().invoke(args=['gc-uploads'])
+    print(result.output.strip())
+    after = store.usage()
+    print(f"after gc: {after['files']} files ({after['bytes'] / 1e6:.1f} MB) + {after['thumbnails']} thumbnails")
+    if after['files'] != len(images) - len(doomed):
+        failures.append(f"expected {len(images) - len(doomed)} files after gc, found {after['files']}")
+
+    services.history_recorder.close()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,9 @@ import os
 from datetime import timedelta
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env file, then the deployment's pro.env
 load_dotenv()
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pro.env'))
 
 class Config:
     """Base configuration class"""
@@ -12,22 +13,100 @@ class Config:
     DEBUG = False
     TESTING = False
     
-    # Database settings
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///sign_language.db'
+    # Database settings; SQLite and PostgreSQL are supported (relative SQLite paths resolve from the app root)
+    SQLALCHEMY_DATABASE_URI = (os.environ.get('DATABASE_URL') or os.environ.get('SQLALCHEMY_DATABASE_URI')
+                               or 'sqlite:///sign_language.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))  # connections kept open per process; 0 disables pooling
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))  # extra connections allowed under bursts
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds before a server connection is replaced
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']  # test connections on checkout
     
     # File upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static/uploads')
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
     ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'webm'}
+    # Keep a copy of each upload for the history pages; written asynchronously, named by content hash
+    PERSIST_UPLOADS = os.environ.get('PERSIST_UPLOADS', 'true').lower() in ['true', 'on', '1']
+    UPLOAD_THUMBNAIL_SIZE = int(os.environ.get('UPLOAD_THUMBNAIL_SIZE', 128))  # px, longest side of history thumbnails
+    UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 31536000))  # content-addressed files never change
+    UPLOAD_GC_GRACE = int(os.environ.get('UPLOAD_GC_GRACE', 86400))  # seconds before an unreferenced upload may be deleted
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 300))  # seconds a logged-in user is served without a query; 0 disables
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))  # users cached per process
+    API_TOKEN_MAX_AGE = int(os.environ.get('API_TOKEN_MAX_AGE', 3600))  # seconds a /api/token bearer token stays valid
+    # Password hashing; stored hashes made with other parameters are upgraded on the next login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')  # werkzeug method:hash:iterations
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # hashes computed at once per process
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))  # beyond this logins get a 503
     
     # Model settings
-    MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models/isl_rnn_model.keras')
+    # Pointing MODEL_PATH at a .tflite or .onnx export selects the matching runtime backend
+    MODEL_PATH = os.environ.get('MODEL_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models/isl_rnn_model.keras')
+    MODEL_BACKEND = os.environ.get('MODEL_BACKEND')  # 'keras', 'tflite' or 'onnx'; None infers it from MODEL_PATH
+    MODEL_NUM_THREADS = int(os.environ.get('MODEL_NUM_THREADS', 0)) or None  # CPU threads for TFLite/ONNX
+    # The model is loaded on the first prediction; inference workers can opt into loading it at startup
+    PRELOAD_MODEL = os.environ.get('PRELOAD_MODEL', 'false').lower() in ['true', 'on', '1']
     LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models/labels.json')
+    PREDICTION_TOP_K = int(os.environ.get('PREDICTION_TOP_K', 3))  # classes returned per prediction
+    # Hot reload: a replaced MODEL_PATH is loaded and warmed in the background, then swapped in
+    MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))  # seconds between checks; 0 disables
+    MODEL_KEEP_VERSIONS = int(os.environ.get('MODEL_KEEP_VERSIONS', 2))  # loaded (and archived under MODEL_PATH.versions/) for rollback
+    MODEL_ADMIN_TOKEN = os.environ.get('MODEL_ADMIN_TOKEN')  # enables /api/model/* when set (X-Admin-Token header)
+    
+    # Inference batching settings
+    INFERENCE_MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 16))  # flush once this many samples are queued
+    INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))  # flush a partial batch after this delay
+    # Inference worker processes; 0 runs inference in the web process through the batching engine
+    INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0))
+    INFERENCE_WORKER_THREADS = int(os.environ.get('INFERENCE_WORKER_THREADS', 1))  # TF intra/inter-op threads per worker
+    INFERENCE_MAX_PENDING = int(os.environ.get('INFERENCE_MAX_PENDING', 256))  # beyond this requests get a 503
+    INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', 10))  # seconds before a request gets a 504
+    # Shared memory slots for passing single 64x64 tensors to the workers without pickling; 0 uses the queue
+    INFERENCE_SHM_TENSOR_SLOTS = int(os.environ.get('INFERENCE_SHM_TENSOR_SLOTS', 64))
+    BATCH_PREDICT_SIZE = int(os.environ.get('BATCH_PREDICT_SIZE', 64))  # images per forward pass in /predict_batch
+    # Zip archives posted to /predict_batch are refused before inflating anything beyond these
+    BATCH_ZIP_MAX_MEMBERS = int(os.environ.get('BATCH_ZIP_MAX_MEMBERS', 1000))  # images per archive
+    BATCH_ZIP_MAX_MEMBER_BYTES = int(os.environ.get('BATCH_ZIP_MAX_MEMBER_BYTES', 16 * 1024 * 1024))  # uncompressed, per image
+    BATCH_ZIP_MAX_TOTAL_BYTES = int(os.environ.get('BATCH_ZIP_MAX_TOTAL_BYTES', 256 * 1024 * 1024))  # uncompressed, per archive
+    
+    # Live webcam stream settings
+    WEBCAM_MAX_FRAME_BYTES = int(os.environ.get('WEBCAM_MAX_FRAME_BYTES', 2 * 1024 * 1024))  # larger WebSocket messages are rejected
+    STREAM_SMOOTHING = os.environ.get('STREAM_SMOOTHING', 'ema')  # 'ema' or 'majority'
+    STREAM_WINDOW = int(os.environ.get('STREAM_WINDOW', 8))  # recent probability vectors kept per session
+    STREAM_STABLE_FRAMES = int(os.environ.get('STREAM_STABLE_FRAMES', 3))  # frames a letter must hold before it is emitted
+    STREAM_MIN_CONFIDENCE = float(os.environ.get('STREAM_MIN_CONFIDENCE', 0.6))  # below this a frame is blank
+    STREAM_GAP_FRAMES = int(os.environ.get('STREAM_GAP_FRAMES', 5))  # blank frames that end a word
+    STREAM_DIFF_THRESHOLD = float(os.environ.get('STREAM_DIFF_THRESHOLD', 3.0))  # mean pixel change needed to rerun the model
+    # Advertised to browsers by /api/capture_config; frames are downsampled to the model input on the canvas
+    WEBCAM_UPLOAD_FORMAT = os.environ.get('WEBCAM_UPLOAD_FORMAT', 'raw')  # 'raw' (RGB bytes, no decode) or 'jpeg'
+    WEBCAM_FRAME_INTERVAL_MS = int(os.environ.get('WEBCAM_FRAME_INTERVAL_MS', 150))  # minimum gap between frames per client
+    WEBCAM_JPEG_QUALITY = float(os.environ.get('WEBCAM_JPEG_QUALITY', 0.9))  # canvas.toBlob quality in 'jpeg' mode
+    
+    # Prediction cache settings
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))  # results kept before LRU eviction
+    PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))  # seconds; 0 disables expiry
+    
+    # History write-behind settings; prediction rows are inserted in bulk off the request path
+    HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 100))  # rows that trigger an immediate write
+    HISTORY_FLUSH_INTERVAL = float(os.environ.get('HISTORY_FLUSH_INTERVAL', 0.5))  # seconds a queued row may wait
+    HISTORY_MAX_PENDING = int(os.environ.get('HISTORY_MAX_PENDING', 10000))  # beyond this requests wait for the writer
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() in ['true', 'on', '1']  # write-ahead logging for SQLite
+    HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', 50))  # rows per /history page and /api/history call
+    
+    # Usage statistics settings; aggregates are kept up to date by the history writer
+    STATS_DAYS = int(os.environ.get('STATS_DAYS', 30))  # days of daily counts returned by /api/stats
+    STATS_CACHE_TTL = float(os.environ.get('STATS_CACHE_TTL', 30))  # seconds a /api/stats response is reused
+    
+    # Instrumentation; /metrics serves per-process counters and stage latency histograms to Prometheus
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    # Requests sent with an 'X-Profile: 1' header get a Server-Timing stage breakdown, also logged
+    PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS', 'false').lower() in ['true', 'on', '1']
     
     # Additional settings
     MAX_VIDEO_DURATION = 30  # maximum video duration in seconds
@@ -37,7 +116,7 @@ class Config:
     @staticmethod
     def init_app(app):
         """Initialize application"""
-        os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 
 class DevelopmentConfig(Config):
@@ -66,9 +145,9 @@ class TestingConfig(Config):
 
 class ProductionConfig(Config):
     """Production configuration"""
-    # Production settings should be loaded from environment variables
+    # Production settings should be loaded from environment variables (or pro.env); the database
+    # URL falls back to Config's, but there is no fallback secret
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     
     # Email configurations
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
@@ -78,6 +157,13 @@ class ProductionConfig(Config):
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
 
+    @staticmethod
+    def init_app(app):
+        """Initialize application, refusing to start with sessions signed by a missing key"""
+        if not app.config['SECRET_KEY']:
+            raise RuntimeError('SECRET_KEY must be set for the production configuration')
+        Config.init_app(app)
+
 
 # Configuration dictionary
 config = {
@@ -85,5 +171,6 @@ config = {
     'testing': TestingConfig,
     'production': ProductionConfig,
     
-    'default': DevelopmentConfig
+    # Anything not asking for development or testing explicitly (FLASK_CONFIG) runs as production
+    'default': ProductionConfig
 }
\ No newline at end of file
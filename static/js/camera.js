@@ -48,24 +48,73 @@ class Camera {
         return canvasElement.toDataURL('image/jpeg');
     }
 
-    captureAsBlob(canvasElement) {
+    captureAsBlob(canvasElement, options = {}) {
+        // Full video size unless a smaller width/height is asked for
+        const width = options.width || this.videoElement.videoWidth;
+        const height = options.height || this.videoElement.videoHeight;
+        const quality = options.quality || 0.95;
         return new Promise((resolve) => {
-            const context = canvasElement.getContext('2d');
-            
-            // Set canvas dimensions to video dimensions
-            canvasElement.width = this.videoElement.videoWidth;
-            canvasElement.height = this.videoElement.videoHeight;
-            
-            // Draw current video frame to canvas
-            context.drawImage(this.videoElement, 0, 0, canvasElement.width, canvasElement.height);
+            this.drawDownsampled(canvasElement, width, height);
             
             // Convert canvas to blob
             canvasElement.toBlob((blob) => {
                 resolve(blob);
-            }, 'image/jpeg', 0.95);
+            }, 'image/jpeg', quality);
         });
     }
 
+    // Scale the current frame on the canvas so only the pixels the model uses are uploaded
+    drawDownsampled(canvasElement, width, height) {
+        const context = canvasElement.getContext('2d', { willReadFrequently: true });
+        canvasElement.width = width;
+        canvasElement.height = height;
+        context.imageSmoothingEnabled = true;
+        context.imageSmoothingQuality = 'high';
+        context.drawImage(this.videoElement, 0, 0, width, height);
+        return context;
+    }
+
+    // Raw RGB bytes (3 per pixel, row-major) for /predict_raw; the server needs no image decoder
+    captureRaw(canvasElement, width = 64, height = 64) {
+        const context = this.drawDownsampled(canvasElement, width, height);
+        const rgba = context.getImageData(0, 0, width, height).data;
+        const rgb = new Uint8Array(width * height * 3);
+        for (let i = 0, j = 0; i < rgba.length; i += 4, j += 3) {
+            rgb[j] = rgba[i];
+            rgb[j + 1] = rgba[i + 1];
+            rgb[j + 2] = rgba[i + 2];
+        }
+        return rgb;
+    }
+
+    // Capture settings the server advertises at /api/capture_config
+    static async loadCaptureConfig(url = '/api/capture_config') {
+        const response = await fetch(url);
+        return response.json();
+    }
+
+    // Capture one frame in the advertised format and post it; resolves to the prediction JSON
+    async predictFrame(canvasElement, config) {
+        let response;
+        if (config.format === 'raw') {
+            response = await fetch(config.raw_url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: this.captureRaw(canvasElement, config.width, config.height)
+            });
+        } else {
+            const blob = await this.captureAsBlob(canvasElement, {
+                width: config.width,
+                height: config.height,
+                quality: config.jpeg_quality
+            });
+            const formData = new FormData();
+            formData.append('image', blob, 'webcam-capture.jpg');
+            response = await fetch(config.jpeg_url, { method: 'POST', body: formData });
+        }
+        return response.json();
+    }
+
     async captureAndSubmit(canvasElement, fileInput, handleFilesCallback) {
         const blob = await this.captureAsBlob(canvasElement);
         const file = new File([blob], "capture.jpg", { type: "image/jpeg" });
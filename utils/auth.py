@@ -2,6 +2,7 @@ from flask_login import LoginManager, UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import re
+from utils.user_cache import UserCache, UserIdentity
 
 login_manager = LoginManager()
 login_manager.login_view = 'login'
@@ -14,38 +15,52 @@ def create_user_model(db):
         id = db.Column(db.Integer, primary_key=True)
         username = db.Column(db.String(50), unique=True, nullable=False)
         email = db.Column(db.String(120), unique=True, nullable=False)
-        password_hash = db.Column(db.String(128), nullable=False)
+        password_hash = db.Column(db.String(255), nullable=False)
         date_joined = db.Column(db.DateTime, default=datetime.utcnow)
         predictions = db.relationship('Prediction', backref='user', lazy=True)
 
-        def set_password(self, password):
-            self.password_hash = generate_password_hash(password)
+        def set_password(self, password, hasher=None):
+            # A utils.passwords.PasswordHasher bounds the cost; without one hash inline
+            self.password_hash = hasher.hash(password) if hasher else generate_password_hash(password)
 
-        def check_password(self, password):
-            return check_password_hash(self.password_hash, password)
+        def check_password(self, password, hasher=None):
+            if not hasher:
+                return check_password_hash(self.password_hash, password)
+            valid, new_hash = hasher.verify(self.password_hash, password)
+            if new_hash:
+                # Made with older cost parameters; replaced transparently
+                self.password_hash = new_hash
+                db.session.commit()
+            return valid
 
     return User
 
-# Define Prediction model globally
+# Define Prediction model globally; same 'prediction' table as app.Prediction
 def create_prediction_model(db):
     class Prediction(db.Model):
         __tablename__ = 'prediction'
         id = db.Column(db.Integer, primary_key=True)
-        user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-        image_path = db.Column(db.String(255))
-        video_path = db.Column(db.String(255))
-        predicted_sign = db.Column(db.String(50), nullable=False)
+        filename = db.Column(db.String(255), nullable=False)
+        predicted_class = db.Column(db.String(10), nullable=False)
         confidence = db.Column(db.Float, nullable=False)
         timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+        user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+        __table_args__ = (db.Index('ix_prediction_user_timestamp', 'user_id', 'timestamp'),)
 
         def __repr__(self):
-            return f"<Prediction {self.id}: {self.predicted_sign} ({self.confidence:.2f}%)>"
+            return f"<Prediction {self.id}: {self.predicted_class} ({self.confidence:.2f}%)>"
 
     return Prediction
 
 # Initialize and configure Flask-Login
-def init_login_manager(app, db, User):
+def init_login_manager(app, db, User, cache=None):
     login_manager.init_app(app)
+    cache = cache or UserCache()
+
+    def load_identity(user_id):
+        user = User.query.get(user_id)
+        return UserIdentity.from_user(user) if user is not None else None
 
     @login_manager.user_loader
     def load_user(user_id):
@@ -54,9 +69,11 @@ def init_login_manager(app, db, User):
         Args:
             user_id: The user ID to load
         Returns:
-            User object or None if not found
+            Cached UserIdentity or None if not found
         """
-        return User.query.get(int(user_id))
+        return cache.get(int(user_id), load_identity)
+
+    return cache
 
 # Validate user registration
 def validate_registration(username, email, password, confirm_password):
@@ -81,7 +98,7 @@ def validate_registration(username, email, password, confirm_password):
     return True, ""
 
 # Register a new user
-def register_user(db, User, username, email, password):
+def register_user(db, User, username, email, password, hasher=None):
     try:
         if User.query.filter_by(username=username).first():
             return False, "Username already taken"
@@ -89,7 +106,7 @@ def register_user(db, User, username, email, password):
             return False, "Email already registered"
 
         new_user = User(username=username, email=email)
-        new_user.set_password(password)
+        new_user.set_password(password, hasher)
         db.session.add(new_user)
         db.session.commit()
         return True, "Registration successful"
@@ -103,10 +120,9 @@ def save_prediction(db, Prediction, user_id, predicted_sign, confidence, image_p
     try:
         prediction = Prediction(
             user_id=user_id,
-            predicted_sign=predicted_sign,
+            predicted_class=predicted_sign,
             confidence=confidence,
-            image_path=image_path,
-            video_path=video_path
+            filename=image_path or video_path
         )
         db.session.add(prediction)
         db.session.commit()
@@ -0,0 +1,260 @@
+import os
+import threading
+
+import numpy as np
+
+# Runtime backends selectable by name or by model file extension
+BACKEND_EXTENSIONS = {
+    '.keras': 'keras',
+    '.h5': 'keras',
+    '.tflite': 'tflite',
+    '.onnx': 'onnx',
+}
+
+
+class KerasBackend:
+    """Runs a Keras model through a traced graph with a fixed input signature"""
+
+    name = 'keras'
+
+    def __init__(self, model_path=None, model=None, input_shape=(64, 64, 3)):
+        """
+        Build the inference graph once
+
+        Args:
+            model_path: Path to the saved Keras model (ignored when model is given)
+            model: Already loaded Keras model
+            input_shape: Shape of a single preprocessed sample
+        """
+        import tensorflow as tf
+
+        self.model = model if model is not None else load_model_with_custom_objects(model_path)
+        self.input_shape = tuple(input_shape)
+
+        # Only the batch dimension is left open, so every batch size reuses one trace
+        signature = [tf.TensorSpec(shape=(None,) + self.input_shape, dtype=tf.float32)]
+
+        @tf.function(input_signature=signature)
+        def serve(batch):
+            return self.model(batch, training=False)
+
+        self._serve = serve
+
+    def predict(self, batch):
+        """
+        Run a forward pass without the model.predict() data adapter and callbacks
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3)
+
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        return self._serve(batch).numpy()
+
+    def warm_up(self, batch_size=1):
+        """Trace the graph and allocate kernels before the first real request"""
+        self.predict(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+
+
+class TFLiteBackend:
+    """Runs an exported .tflite model without loading full TensorFlow when possible"""
+
+    name = 'tflite'
+
+    def __init__(self, model_path, input_shape=(64, 64, 3), num_threads=None):
+        """
+        Load the interpreter
+
+        Args:
+            model_path: Path to the .tflite file
+            input_shape: Shape of a single preprocessed sample
+            num_threads: Number of CPU threads the interpreter may use
+        """
+        Interpreter = _import_tflite_interpreter()
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.input_shape = tuple(input_shape)
+        input_details = self.interpreter.get_input_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        # Exports with a static batch dimension (e.g. unrolled LSTMs) are run one sample at a time
+        self._fixed_batch = input_details['shape_signature'][0] != -1
+        self._batch_size = None
+        # The interpreter is not thread-safe and is shared by the batcher and the webcam streams
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        """
+        Run a forward pass
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3)
+
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            return self._predict(batch)
+
+    def _predict(self, batch):
+        if self._fixed_batch:
+            if self._batch_size is None:
+                self.interpreter.allocate_tensors()
+                self._batch_size = 1
+            return np.concatenate([self._invoke(sample[np.newaxis]) for sample in batch])
+
+        if batch.shape[0] != self._batch_size:
+            # Tensors are only reallocated when the batch size actually changes
+            self.interpreter.resize_tensor_input(self._input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        return self._invoke(batch)
+
+    def _invoke(self, batch):
+        self.interpreter.set_tensor(self._input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output_index).copy()
+
+    def warm_up(self, batch_size=1):
+        """Allocate tensors before the first real request"""
+        self.predict(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+
+
+class ONNXBackend:
+    """Runs an exported .onnx model with ONNX Runtime on the CPU"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, input_shape=(64, 64, 3), num_threads=None):
+        """
+        Create the inference session
+
+        Args:
+            model_path: Path to the .onnx file
+            input_shape: Shape of a single preprocessed sample
+            num_threads: Number of intra-op threads the session may use
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_shape = tuple(input_shape)
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        """
+        Run a forward pass
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3)
+
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch})[0]
+
+    def warm_up(self, batch_size=1):
+        """Initialize the session before the first real request"""
+        self.predict(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+
+
+def load_model_with_custom_objects(filepath):
+    """
+    Load a Keras model, retrying with a compatible InputLayer for files saved with 'batch_shape'
+
+    Args:
+        filepath: Path to the saved Keras model
+
+    Returns:
+        Loaded Keras model
+    """
+    import keras
+    import tensorflow as tf
+
+    try:
+        return tf.keras.models.load_model(filepath)
+    except TypeError as e:
+        if "batch_shape" in str(e):
+            with keras.utils.custom_object_scope({
+                'InputLayer': lambda config: keras.layers.InputLayer(
+                    shape=config.get('batch_shape')[1:] if config.get('batch_shape') else None,
+                    dtype=config.get('dtype'),
+                    sparse=config.get('sparse', False),
+                    ragged=config.get('ragged', False),
+                    name=config.get('name')
+                )
+            }):
+                return tf.keras.models.load_model(filepath)
+        else:
+            raise e
+
+
+BACKENDS = {
+    'keras': KerasBackend,
+    'tflite': TFLiteBackend,
+    'onnx': ONNXBackend,
+}
+
+
+def _import_tflite_interpreter():
+    # Prefer the standalone runtimes; full TensorFlow is the last resort
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def resolve_backend_name(model_path, backend=None):
+    """
+    Work out which runtime should serve a model
+
+    Args:
+        model_path: Path to the model file
+        backend: Explicit backend name, or None to infer it from the file extension
+
+    Returns:
+        Backend name, one of BACKENDS
+    """
+    if backend:
+        name = backend.lower()
+    else:
+        extension = os.path.splitext(model_path)[1].lower()
+        name = BACKEND_EXTENSIONS.get(extension, 'keras')
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return name
+
+
+def load_backend(model_path, backend=None, input_shape=(64, 64, 3), num_threads=None):
+    """
+    Load a model with the requested runtime backend
+
+    Args:
+        model_path: Path to the model file
+        backend: 'keras', 'tflite' or 'onnx'; inferred from the file extension when None
+        input_shape: Shape of a single preprocessed sample
+        num_threads: Number of CPU threads for the TFLite and ONNX runtimes
+
+    Returns:
+        Backend instance exposing predict(batch) and warm_up()
+    """
+    name = resolve_backend_name(model_path, backend)
+    if name == 'keras':
+        return KerasBackend(model_path, input_shape=input_shape)
+    return BACKENDS[name](model_path, input_shape=input_shape, num_threads=num_threads)
@@ -0,0 +1,284 @@
+"""
+Classify many images at once: directories, zip archives or individual files
+
+Images are decoded by a thread pool, run through the model in large batches and
+written out one record per line as soon as each batch finishes.
+
+Usage (from the repository root):
+    python -m utils.batch_predict captures/ archive.zip --format csv --output scores.csv
+"""
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.preprocessing import load_image_tensor
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
+OUTPUT_FIELDS = ['name', 'predicted_class', 'confidence', 'error']
+
+
+def _is_image(name):
+    return '.' in name and name.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def check_zip(archive, max_members=None, max_member_bytes=None, max_total_bytes=None):
+    """
+    Refuse an archive whose central directory promises more than the limits allow
+
+    Only the directory is read, so a zip bomb is rejected before anything is inflated.
+    zipfile never inflates a member past its declared size, so the declared sizes bound the work.
+
+    Args:
+        archive: zipfile.ZipFile
+        max_members: Largest number of image members; None for no limit
+        max_member_bytes: Largest uncompressed size of one member; None for no limit
+        max_total_bytes: Largest uncompressed size of all image members together; None for no limit
+
+    Returns:
+        List of the image members' ZipInfo
+
+    Raises:
+        ValueError: If a limit is exceeded
+    """
+    members = [info for info in archive.infolist() if not info.is_dir() and _is_image(info.filename)]
+    if max_members is not None and len(members) > max_members:
+        raise ValueError(f'Archive holds {len(members)} images; at most {max_members} are accepted')
+    if max_member_bytes is not None:
+        for info in members:
+            if info.file_size > max_member_bytes:
+                raise ValueError(f'{info.filename} is {info.file_size} bytes uncompressed; '
+                                 f'at most {max_member_bytes} are accepted')
+    total = sum(info.file_size for info in members)
+    if max_total_bytes is not None and total > max_total_bytes:
+        raise ValueError(f'Archive images total {total} bytes uncompressed; at most {max_total_bytes} are accepted')
+    return members
+
+
+def iter_zip(archive, prefix='', max_members=None, max_member_bytes=None, max_total_bytes=None):
+    """
+    Yield the images inside an open zip archive
+
+    Members are read here, on the caller's thread, so the pool never shares the archive.
+
+    Args:
+        archive: zipfile.ZipFile
+        prefix: Prepended to member names in the output
+        max_members: Largest number of image members; None for no limit
+        max_member_bytes: Largest uncompressed size of one member; None for no limit
+        max_total_bytes: Largest uncompressed size of all image members together; None for no limit
+
+    Yields:
+        (name, encoded image bytes)
+
+    Raises:
+        ValueError: If the archive exceeds a limit, before any member is read
+    """
+    for info in check_zip(archive, max_members, max_member_bytes, max_total_bytes):
+        yield prefix + info.filename, archive.read(info)
+
+
+def iter_sources(paths):
+    """
+    Expand files, directories and zip archives into the images they contain
+
+    Args:
+        paths: Iterable of file or directory paths
+
+    Yields:
+        (name, source) where source is a file path or encoded image bytes
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    if _is_image(filename):
+                        yield os.path.join(root, filename), os.path.join(root, filename)
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                yield from iter_zip(archive, prefix=path + ':')
+        else:
+            yield path, path
+
+
+def _decode(source):
+    # The decode and resize /predict uses, so both endpoints give an image the same class
+    return load_image_tensor(source)
+
+
+def predict_stream(sources, predict_batch, class_labels, batch_size=64, workers=None):
+    """
+    Predict every image from sources, decoding in parallel and running large batches
+
+    At most a few batches of decoded images are in flight, so memory does not grow
+    with the number of inputs.
+
+    Args:
+        sources: Iterable of (name, source) pairs, e.g. from iter_sources
+        predict_batch: Callable mapping an (N, 64, 64, 3) float32 batch to (N, num_classes) probabilities
+        class_labels: List of class labels indexed by model output
+        batch_size: Number of images per forward pass
+        workers: Number of decoding threads; defaults to the CPU count
+
+    Yields:
+        One dictionary per input, in input order, with name, predicted_class and confidence, or name and error
+    """
+    workers = workers or os.cpu_count() or 4
+    batch = None
+    names = []
+    # Output rows since the last flush, in input order; None marks the next image of the batch
+    held = []
+
+    def flush():
+        predictions = np.asarray(predict_batch(batch[:len(names)]))
+        pred_class_idx = np.argmax(predictions, axis=1)
+        records = []
+        i = 0
+        for record in held:
+            if record is None:
+                idx = int(pred_class_idx[i])
+                record = {
+                    'name': names[i],
+                    'predicted_class': class_labels[idx],
+                    'confidence': float(predictions[i][idx])
+                }
+                i += 1
+            records.append(record)
+        del names[:]
+        del held[:]
+        return records
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-decode') as executor:
+        pending = collections.deque()
+        sources = iter(sources)
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a bounded window of decodes running ahead of the model
+            while not exhausted and len(pending) < batch_size * 2:
+                try:
+                    name, source = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((name, executor.submit(_decode, source)))
+            if not pending:
+                break
+
+            name, future = pending.popleft()
+            try:
+                tensor = future.result()
+            except Exception as e:
+                if names:
+                    # Held back until the images before it have been predicted, so rows stay in input order
+                    held.append({'name': name, 'error': str(e)})
+                else:
+                    yield {'name': name, 'error': str(e)}
+                continue
+
+            if batch is None:
+                batch = np.empty((batch_size,) + tensor.shape, dtype=np.float32)
+            batch[len(names)] = tensor
+            names.append(name)
+            held.append(None)
+            if len(names) == batch_size:
+                yield from flush()
+
+        if names:
+            yield from flush()
+
+
+def iter_rows(records, fmt='jsonl'):
+    """
+    Render records as output text, one row at a time
+
+    Args:
+        records: Iterable of result dictionaries
+        fmt: 'jsonl' or 'csv'
+
+    Yields:
+        Text chunks, each ending in a newline (the CSV header comes first)
+    """
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=OUTPUT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Header only: there were no records
+            yield buffer.getvalue()
+    else:
+        for record in records:
+            yield json.dumps(record) + '\n'
+
+
+def write_records(records, out, fmt='jsonl'):
+    """
+    Write records incrementally, flushing after every row
+
+    Args:
+        records: Iterable of result dictionaries
+        out: Text file object
+        fmt: 'jsonl' or 'csv'
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for row in iter_rows(counted(), fmt):
+        out.write(row)
+        out.flush()
+    return count
+
+
+def main():
+    from config import Config
+    from utils.model_utils import ISLModelPredictor
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='Image files, directories or zip archives')
+    parser.add_argument('--model', default=Config.MODEL_PATH, help='Path to the model (.keras, .tflite or .onnx)')
+    parser.add_argument('--backend', default=Config.MODEL_BACKEND, help="'keras', 'tflite' or 'onnx'")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help='Output format')
+    parser.add_argument('--output', default='-', help="Output file, or '-' for stdout")
+    parser.add_argument('--batch-size', type=int, default=64, help='Images per forward pass')
+    parser.add_argument('--workers', type=int, default=None, help='Decoding threads (default: CPU count)')
+    args = parser.parse_args()
+
+    predictor = ISLModelPredictor(args.model, backend=args.backend, num_threads=Config.MODEL_NUM_THREADS)
+
+    records = predict_stream(
+        iter_sources(args.inputs),
+        predict_batch=predictor.predict_batch,
+        class_labels=predictor.class_labels,
+        batch_size=args.batch_size,
+        workers=args.workers
+    )
+    if args.output == '-':
+        count = write_records(records, sys.stdout, args.format)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            count = write_records(records, out, args.format)
+    print(f"Wrote {count} predictions", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
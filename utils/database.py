@@ -0,0 +1,128 @@
+from sqlalchemy.engine import make_url
+
+
+def normalize_database_uri(uri):
+    """
+    Accept the postgres:// scheme many hosts still hand out
+
+    Args:
+        uri: Database URL from the environment
+
+    Returns:
+        URL SQLAlchemy 1.4+ can load
+    """
+    if uri and uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri, pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=1800, pre_ping=True):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a database URL
+
+    Args:
+        uri: Database URL
+        pool_size: Connections kept open per process; 0 opens a new connection for every checkout
+        max_overflow: Extra connections allowed beyond pool_size under bursts
+        pool_timeout: Seconds a request waits for a free connection before failing
+        pool_recycle: Seconds after which a connection is replaced, before the server drops it
+        pre_ping: Test each connection on checkout so restarts and failovers are survived
+
+    Returns:
+        Dictionary of create_engine() keyword arguments
+    """
+    from sqlalchemy.pool import NullPool, QueuePool
+
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # Flask-SQLAlchemy shares one StaticPool connection for in-memory databases
+            return {}
+        if not pool_size:
+            return {'poolclass': NullPool}
+        # SQLAlchemy 1.4 defaults file databases to NullPool; a queue keeps WAL connections warm
+        return {
+            'poolclass': QueuePool,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout,
+            'connect_args': {'check_same_thread': False}
+        }
+
+    if not pool_size:
+        return {'poolclass': NullPool}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pre_ping
+    }
+
+
+def add_missing_columns(engine, columns):
+    """
+    Add nullable columns that create_all() skips because their table already exists
+
+    Args:
+        engine: SQLAlchemy engine
+        columns: List of (Table, column name) pairs; each column must be nullable
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, name in columns:
+            if name in {column['name'] for column in inspector.get_columns(table.name)}:
+                continue
+            column = table.c[name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            preparer = engine.dialect.identifier_preparer
+            connection.execute(text(
+                f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.quote(name)} {column_type}'
+            ))
+
+
+def upsert(connection, table, key, values, increment=(), replace=()):
+    """
+    Insert a row, or fold it into the row that already holds the same key, safely across processes
+
+    PostgreSQL and SQLite 3.24+ do it in one INSERT ... ON CONFLICT DO UPDATE statement.
+    Elsewhere the insert runs in a savepoint and a conflicting insert falls back to an update,
+    so a concurrent writer never aborts the caller's transaction.
+
+    Args:
+        connection: Connection with an open transaction
+        table: Table with a unique constraint or index over exactly the key columns
+        key: Dictionary of key column values
+        values: Dictionary of the other column values for a new row
+        increment: Columns added to the existing row's value on conflict
+        replace: Columns overwritten with the new value on conflict
+    """
+    from sqlalchemy import func
+    from sqlalchemy.exc import IntegrityError
+
+    row = dict(key, **values)
+    dialect = connection.dialect.name
+    if dialect == 'postgresql' or (dialect == 'sqlite' and connection.dialect.dbapi.sqlite_version_info >= (3, 24)):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table).values(row)
+        changes = {name: func.coalesce(table.c[name], 0) + statement.excluded[name] for name in increment}
+        changes.update({name: statement.excluded[name] for name in replace})
+        connection.execute(statement.on_conflict_do_update(index_elements=list(key), set_=changes))
+        return
+
+    condition = [table.c[name] == value for name, value in key.items()]
+    changes = {name: func.coalesce(table.c[name], 0) + values[name] for name in increment}
+    changes.update({name: values[name] for name in replace})
+    if connection.execute(table.update().where(*condition).values(changes)).rowcount:
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(table.insert().values(row))
+    except IntegrityError:
+        # Another process inserted the key between our update and insert
+        connection.execute(table.update().where(*condition).values(changes))
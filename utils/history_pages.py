@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Build the opaque cursor that points just past a row
+
+    Args:
+        timestamp: Sort timestamp of the last row on the page
+        row_id: Primary key of the last row, breaks ties between equal timestamps
+
+    Returns:
+        Cursor string safe to put in a query string
+    """
+    return f"{timestamp.strftime('%Y%m%dT%H%M%S%f')}_{row_id}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string from the client
+
+    Returns:
+        (timestamp, row_id) tuple
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    timestamp, _, row_id = cursor.partition('_')
+    return datetime.strptime(timestamp, '%Y%m%dT%H%M%S%f'), int(row_id)
+
+
+def keyset_page(query, time_column, id_column, cursor=None, limit=50):
+    """
+    Fetch one page of a newest-first listing without OFFSET
+
+    The query seeks straight to the cursor through the (user_id, time) index, so
+    page 500 costs the same as page 1 and only one page is ever held in memory.
+
+    Args:
+        query: Query already filtered to one user and selecting the rendered columns
+            (including time_column and id_column)
+        time_column: Column the listing is sorted by, newest first
+        id_column: Primary key column used as the tie-breaker
+        cursor: Cursor returned with the previous page, or None for the first page
+        limit: Rows per page
+
+    Returns:
+        (rows, next_cursor) tuple; next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        after_time, after_id = decode_cursor(cursor)
+        # The leading <= lets the database range-scan the index; the OR only resolves ties
+        query = query.filter(and_(
+            time_column <= after_time,
+            or_(time_column < after_time, id_column < after_id)
+        ))
+    # One extra row tells whether another page exists without a COUNT(*)
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, time_column.key), getattr(last, id_column.key))
@@ -0,0 +1,178 @@
+import queue
+import sqlite3
+import threading
+import time
+
+# Sentinels placed on the queue to flush early or stop the writer thread
+_FLUSH = object()
+_STOP = object()
+
+
+def enable_sqlite_wal(engine):
+    """
+    Switch a SQLite database to write-ahead logging
+
+    Readers no longer block the writer, and with synchronous=NORMAL a commit
+    only fsyncs at checkpoints instead of on every transaction.
+
+    Args:
+        engine: SQLAlchemy engine; anything other than SQLite is left untouched
+    """
+    from sqlalchemy import event
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    def _on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.close()
+
+    event.listen(engine, 'connect', _on_connect)
+    # Connections opened before the listener existed get the pragmas now
+    engine.dispose()
+
+
+class HistoryRecorder:
+    """Write-behind queue that stores history rows in bulk from one background thread"""
+
+    def __init__(self, write_batch, max_batch_size=100, flush_interval=0.5, max_pending=10000):
+        """
+        Initialize the recorder
+
+        Args:
+            write_batch: Callable taking a list of (kind, row) records and writing them in one transaction
+            max_batch_size: Number of queued records that triggers an immediate write
+            flush_interval: Longest time in seconds the oldest queued record waits before it is written
+            max_pending: Records allowed in the queue; beyond this record() blocks until the writer catches up
+        """
+        self.write_batch = write_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def record(self, kind, row):
+        """
+        Queue one row for the next bulk write
+
+        Args:
+            kind: Table the row belongs to, e.g. 'prediction' or 'translation'
+            row: Dictionary of column values; timestamps should be set by the caller
+        """
+        if self._closed:
+            raise RuntimeError('HistoryRecorder is closed')
+        self._ensure_started()
+        self._queue.put((kind, row))
+
+    def flush(self, timeout=None):
+        """
+        Write everything queued so far and wait until it is committed
+
+        Args:
+            timeout: Optional number of seconds to wait
+
+        Returns:
+            True if the queued records were written before the timeout
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def stats(self):
+        """
+        Report the recorder's progress
+
+        Returns:
+            Dictionary with queued, written and failed record counts
+        """
+        return {
+            'running': self._thread is not None,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches
+        }
+
+    def close(self):
+        """Write the remaining records and stop the writer thread"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put((_STOP, None))
+            thread.join()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name='history-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            pending, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            item = first
+            while True:
+                kind, payload = item
+                if kind is _STOP:
+                    stopping = True
+                elif kind is _FLUSH:
+                    waiters.append(payload)
+                else:
+                    pending.append(item)
+                # A flush or stop request writes immediately instead of waiting out the interval
+                if stopping or waiters or len(pending) >= self.max_batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if stopping:
+                # Drain whatever was queued behind the stop request so nothing is lost on shutdown
+                while True:
+                    try:
+                        kind, payload = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if kind is _FLUSH:
+                        waiters.append(payload)
+                    elif kind is not _STOP:
+                        pending.append((kind, payload))
+
+            for start in range(0, len(pending), self.max_batch_size):
+                self._write(pending[start:start + self.max_batch_size])
+            for done in waiters:
+                done.set()
+
+    def _write(self, records):
+        try:
+            self.write_batch(records)
+        except Exception as e:
+            # History is best effort: a failed batch must not take the writer thread down with it
+            self.failed += len(records)
+            print(f"Error saving {len(records)} history records: {e!r}")
+            return
+        self.written += len(records)
+        self.batches += 1
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.prediction_result import top_k_results
+
+# Sentinel placed on the queue to stop the batching thread
+_STOP = object()
+
+
+class _PendingRequest:
+    """A single queued tensor waiting for a batched forward pass"""
+
+    __slots__ = ('tensor', 'future', 'enqueued_at')
+
+    def __init__(self, tensor):
+        self.tensor = tensor
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchingInferenceEngine:
+    """Shared inference engine that groups concurrent requests into micro-batches"""
+
+    def __init__(self, predict_fn, class_labels, max_batch_size=16, max_wait_ms=5.0,
+                 input_shape=(64, 64, 3), top_k=3):
+        """
+        Initialize the engine
+
+        Args:
+            predict_fn: Callable mapping an (N, 64, 64, 3) float32 batch to (N, num_classes) probabilities,
+                or to a (probabilities, model_version) pair to tag each result with the version that produced it
+            class_labels: List of class labels indexed by model output
+            max_batch_size: Number of queued samples that triggers an immediate flush
+            max_wait_ms: Longest time the oldest queued sample waits before a partial batch is flushed
+            input_shape: Shape of a single preprocessed sample
+            top_k: Number of best classes each result keeps
+        """
+        self.predict_fn = predict_fn
+        self.class_labels = class_labels
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+        self.input_shape = tuple(input_shape)
+        self.top_k = top_k
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Reused for every flush so batching never allocates a new input array
+        self._batch = np.empty((self.max_batch_size,) + self.input_shape, dtype=np.float32)
+
+    def submit(self, img_array):
+        """
+        Queue one preprocessed image for the next batch
+
+        Args:
+            img_array: Array of shape (64, 64, 3) or (1, 64, 64, 3)
+
+        Returns:
+            Future resolving to a PredictionResult
+        """
+        tensor = np.asarray(img_array)
+        if tensor.shape != self.input_shape:
+            if tensor.shape == (1,) + self.input_shape:
+                tensor = tensor[0]
+            else:
+                raise ValueError(f"Expected input of shape {self.input_shape}, got {tensor.shape}")
+
+        self._ensure_started()
+        request = _PendingRequest(tensor)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, img_array, timeout=None):
+        """
+        Run a prediction through the shared batch and wait for its result
+
+        Args:
+            img_array: Array of shape (64, 64, 3) or (1, 64, 64, 3)
+            timeout: Optional number of seconds to wait for the result
+
+        Returns:
+            PredictionResult with predicted class, confidence and top-k
+        """
+        return self.submit(img_array).result(timeout)
+
+    def stats(self):
+        """
+        Report the engine's health
+
+        Returns:
+            Dictionary with the number of queued requests and the batching settings
+        """
+        return {
+            'mode': 'in-process',
+            'running': self._thread is not None,
+            'queue_depth': self._queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
+
+    def close(self):
+        """Stop the batching thread after the queued requests have been served"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='inference-batcher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            pending = [first]
+            deadline = first.enqueued_at + self.max_wait
+            while len(pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        # Deadline passed: still take whatever is already queued
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                pending.append(item)
+
+            self._flush(pending)
+
+    def _flush(self, pending):
+        count = len(pending)
+        batch = self._batch[:count]
+        for i, request in enumerate(pending):
+            batch[i] = request.tensor
+
+        try:
+            predictions = self.predict_fn(batch)
+        except Exception as e:
+            for request in pending:
+                request.future.set_exception(e)
+            return
+        model_version = None
+        if isinstance(predictions, tuple):
+            predictions, model_version = predictions
+
+        # One partial sort for the whole batch instead of a dict per sample
+        results = top_k_results(np.asarray(predictions), self.class_labels, self.top_k, model_version=model_version)
+        for request, result in zip(pending, results):
+            request.future.set_result(result)
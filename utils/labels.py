@@ -0,0 +1,22 @@
+import json
+from functools import lru_cache
+
+from config import Config
+
+
+@lru_cache(maxsize=None)
+def load_labels(path=Config.LABELS_PATH):
+    """
+    Load the model's class labels once per process
+
+    Args:
+        path: JSON file holding the labels as a list, in model output order
+
+    Returns:
+        Tuple of class labels indexed by model output
+    """
+    with open(path) as f:
+        labels = json.load(f)
+    if not isinstance(labels, list) or not labels:
+        raise ValueError(f"'{path}' must contain a non-empty JSON list of class labels")
+    return tuple(str(label) for label in labels)
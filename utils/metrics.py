@@ -0,0 +1,202 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds; spans a cached 64x64 lookup (sub-millisecond) to a slow video upload
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram in the Prometheus layout"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Per-process counters, latency histograms and gauges rendered in the Prometheus text format
+
+    Each process keeps its own values; a scraper adds them up across processes.
+    """
+
+    def __init__(self, prefix='isl', buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the registry
+
+        Args:
+            prefix: Prepended to every metric name
+            buckets: Histogram upper bounds in seconds
+        """
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=None, amount=1):
+        """
+        Increase a counter
+
+        Args:
+            name: Counter name without the prefix, ending in '_total'
+            labels: Optional dictionary of label values; keep their cardinality small
+            amount: Increment
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, labels=None):
+        """
+        Record a duration in a histogram
+
+        Args:
+            name: Histogram name without the prefix, ending in '_seconds'
+            seconds: Observed duration
+            labels: Optional dictionary of label values
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def add_collector(self, name, collect):
+        """
+        Export the numeric fields of a component's stats() as gauges at scrape time
+
+        Args:
+            name: Gauge name prefix, e.g. 'prediction_cache'
+            collect: Callable returning a dictionary; non-numeric values are skipped
+        """
+        self._collectors.append((name, collect))
+
+    def timer(self):
+        """
+        Start a per-request stage breakdown
+
+        Returns:
+            StageTimer feeding this registry's 'stage_duration_seconds' histogram
+        """
+        return StageTimer(self)
+
+    def render(self):
+        """
+        Format every metric for a Prometheus scrape
+
+        Returns:
+            Text exposition format, version 0.0.4
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count)) for key, h in self._histograms.items()
+            )
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            name = f'{self.prefix}_{name}'
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for (name, labels), (counts, total, count) in histograms:
+            name = f'{self.prefix}_{name}'
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        for collector_name, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception:
+                # A broken component must not take the whole scrape down with it
+                continue
+            for field, value in sorted(values.items()):
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f'{self.prefix}_{collector_name}_{field}'
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    """Times the stages of one request and feeds them to a Metrics registry"""
+
+    __slots__ = ('metrics', 'started', 'stages')
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block as one stage
+
+        Args:
+            name: Stage name, e.g. 'decode' or 'inference'
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages.append((name, elapsed))
+            self.metrics.observe('stage_duration_seconds', elapsed, {'stage': name})
+
+    def elapsed(self):
+        """Seconds since the timer started"""
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """
+        Format the breakdown for a Server-Timing header, shown by browser developer tools
+
+        Returns:
+            Header value such as 'read;dur=0.05, decode;dur=1.20, total;dur=4.10' (milliseconds)
+        """
+        parts = [f'{name};dur={seconds * 1000.0:.2f}' for name, seconds in self.stages]
+        parts.append(f'total;dur={self.elapsed() * 1000.0:.2f}')
+        return ', '.join(parts)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
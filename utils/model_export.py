@@ -0,0 +1,228 @@
+"""
+Export isl_rnn_model.keras to lighter CPU runtimes and check them against the Keras model
+
+Usage (from the repository root):
+    python -m utils.model_export convert --output models/isl_rnn_model.tflite --quantize dynamic
+    python -m utils.model_export convert --output models/isl_rnn_model.onnx
+    python -m utils.model_export parity models/isl_rnn_model.tflite --samples static/img
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from utils.backends import KerasBackend, load_backend, resolve_backend_name
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+DEFAULT_SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'img')
+
+
+def load_sample_images(directories, img_size=(64, 64)):
+    """
+    Load every image under the given directories as one normalised float32 batch
+
+    Args:
+        directories: Iterable of directory paths
+        img_size: Target (width, height)
+
+    Returns:
+        NumPy array of shape (N, 64, 64, 3)
+    """
+    samples = []
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    img = Image.open(os.path.join(root, name)).convert('RGB').resize(img_size, Image.NEAREST)
+                    samples.append(np.asarray(img, dtype=np.float32) / 255.0)
+    if not samples:
+        return np.empty((0, img_size[1], img_size[0], 3), dtype=np.float32)
+    return np.stack(samples)
+
+
+def export_tflite(model_path, output_path, quantize='none', calibration=None):
+    """
+    Convert a Keras model to TFLite
+
+    Args:
+        model_path: Path to the .keras model
+        output_path: Destination .tflite path
+        quantize: 'none', 'dynamic' (int8 weights) or 'int8' (int8 weights and activations)
+        calibration: Float32 batch used to calibrate activation ranges for int8
+    """
+    import tensorflow as tf
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+
+    backend = KerasBackend(model_path)
+    # The LSTM layers only lower to TFLite kernels with a static batch dimension and
+    # with their weights frozen into constants
+    concrete_fn = tf.function(lambda batch: backend.model(batch, training=False)).get_concrete_function(
+        tf.TensorSpec((1,) + backend.input_shape, tf.float32)
+    )
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([convert_variables_to_constants_v2(concrete_fn)])
+
+    if quantize in ('dynamic', 'int8'):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'int8':
+        if calibration is None or len(calibration) == 0:
+            raise ValueError("int8 quantization needs calibration images (--calibration-dir)")
+
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[np.newaxis]]
+
+        converter.representative_dataset = representative_dataset
+        # Fall back to float kernels for ops without an int8 implementation; model I/O stays float32
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS
+        ]
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+
+def export_onnx(model_path, output_path):
+    """
+    Convert a Keras model to ONNX (requires tf2onnx)
+
+    Args:
+        model_path: Path to the .keras model
+        output_path: Destination .onnx path
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    backend = KerasBackend(model_path)
+    serve = tf.function(lambda batch: backend.model(batch, training=False))
+    signature = (tf.TensorSpec((None,) + backend.input_shape, tf.float32, name='input'),)
+    tf2onnx.convert.from_function(serve, input_signature=signature, output_path=output_path)
+
+
+def _measure_backend(model_path, backend, samples, repeats):
+    # Runs in a fresh process so the reported RSS belongs to this backend alone
+    start = time.perf_counter()
+    runtime = load_backend(model_path, backend=backend)
+    runtime.warm_up()
+    load_seconds = time.perf_counter() - start
+
+    probabilities = runtime.predict(samples)
+    latencies = []
+    for _ in range(repeats):
+        for sample in samples:
+            start = time.perf_counter()
+            runtime.predict(sample[np.newaxis])
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        'backend': runtime.name,
+        'model_path': model_path,
+        'top1': np.argmax(probabilities, axis=1).tolist(),
+        'load_seconds': load_seconds,
+        'latency_median_ms': float(np.median(latencies)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    }
+
+
+def measure_backend(model_path, backend, samples, repeats=3):
+    """
+    Load a backend in its own process and measure top-1 labels, latency and peak RSS
+
+    Args:
+        model_path: Path to the model file
+        backend: Backend name, or None to infer it from the file extension
+        samples: Float32 batch of shape (N, 64, 64, 3)
+        repeats: Number of timed passes over the samples
+
+    Returns:
+        Dictionary with top-1 indices and performance figures
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(_measure_backend, (model_path, backend, samples, repeats))
+
+
+def check_parity(reference_path, candidate_paths, samples, repeats=3, min_agreement=1.0):
+    """
+    Compare candidate exports with the reference model on a sample set
+
+    Returns:
+        True when every candidate meets the top-1 agreement threshold
+    """
+    reference = measure_backend(reference_path, 'keras', samples, repeats)
+    reports = [reference] + [measure_backend(path, None, samples, repeats) for path in candidate_paths]
+
+    print(f"{'backend':<8} {'model':<40} {'top-1 match':>11} {'median ms':>10} {'p95 ms':>8} "
+          f"{'load s':>7} {'peak RSS MB':>12}")
+    ok = True
+    for report in reports:
+        matches = sum(a == b for a, b in zip(report['top1'], reference['top1']))
+        agreement = matches / len(samples)
+        if agreement < min_agreement:
+            ok = False
+        print(f"{report['backend']:<8} {os.path.basename(report['model_path']):<40} "
+              f"{agreement:>10.1%} {report['latency_median_ms']:>10.3f} {report['latency_p95_ms']:>8.3f} "
+              f"{report['load_seconds']:>7.2f} {report['peak_rss_mb']:>12.1f}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help='Export the Keras model to TFLite or ONNX')
+    convert.add_argument('--model', default=Config.MODEL_PATH, help='Source .keras model')
+    convert.add_argument('--output', required=True, help='Destination .tflite or .onnx file')
+    convert.add_argument('--quantize', choices=['none', 'dynamic', 'int8'], default='none',
+                         help='TFLite quantization mode')
+    convert.add_argument('--calibration-dir', action='append', default=[],
+                         help='Image directory used to calibrate int8 quantization (repeatable)')
+
+    parity = subparsers.add_parser('parity', help='Check exported models against the Keras model')
+    parity.add_argument('candidates', nargs='+', help='Exported model files to check')
+    parity.add_argument('--reference', default=Config.MODEL_PATH, help='Reference .keras model')
+    parity.add_argument('--samples', action='append', default=[],
+                        help='Image directory with sample inputs (repeatable)')
+    parity.add_argument('--num-random', type=int, default=0, help='Extra random inputs to include')
+    parity.add_argument('--repeats', type=int, default=3, help='Timed passes over the sample set')
+    parity.add_argument('--min-agreement', type=float, default=1.0,
+                        help='Required fraction of matching top-1 labels')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        target = resolve_backend_name(args.output)
+        if target == 'tflite':
+            calibration = load_sample_images(args.calibration_dir)
+            export_tflite(args.model, args.output, args.quantize, calibration)
+        elif target == 'onnx':
+            if args.quantize != 'none':
+                parser.error('--quantize is only supported for TFLite exports')
+            export_onnx(args.model, args.output)
+        else:
+            parser.error('--output must end in .tflite or .onnx')
+        print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+        return 0
+
+    samples = load_sample_images(args.samples or [DEFAULT_SAMPLE_DIR])
+    if args.num_random:
+        rng = np.random.default_rng(0)
+        samples = np.concatenate([samples, rng.random((args.num_random, 64, 64, 3), dtype=np.float32)])
+    if len(samples) == 0:
+        parser.error('No sample images found; pass --samples or --num-random')
+
+    ok = check_parity(args.reference, args.candidates, samples, args.repeats, args.min_agreement)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from utils.prediction_cache import model_file_version
+
+
+class ModelRegistry:
+    """
+    Versioned holder of ISLModelPredictor instances
+
+    The model is loaded lazily on first use. When watching is enabled, a background
+    thread notices a replaced MODEL_PATH, loads and warms the new version while the
+    current one keeps serving, then swaps it in with a single reference assignment.
+    Callers that already hold a predictor (a batch mid forward pass) finish on it;
+    the last few versions stay loaded so a rollback needs no reload.
+
+    Every loaded file is kept under '<model_path>.versions/' and a rollback is recorded
+    in '<model_path>.pin', so the pin is shared: the watchers of the other processes
+    serving the same file switch to the pinned version, and a restarted process starts
+    on it, until the file is replaced again or reload() is called.
+    """
+
+    def __init__(self, model_path, backend=None, num_threads=None, keep_versions=2, watch_interval=0):
+        """
+        Record where the model lives without loading it
+
+        Args:
+            model_path: Path to the saved model (.keras, .tflite or .onnx)
+            backend: Runtime backend name; inferred from model_path when None
+            num_threads: Number of CPU threads for the TFLite and ONNX runtimes
+            keep_versions: Loaded versions kept in memory, the active one included
+            watch_interval: Seconds between checks of model_path for a new version; 0 disables watching
+        """
+        self.model_path = model_path
+        self.backend = backend
+        self.num_threads = num_threads
+        self.keep_versions = max(1, int(keep_versions))
+        self.watch_interval = max(0.0, float(watch_interval))
+
+        self.reloads = 0
+        self.rollbacks = 0
+        self.load_failures = 0
+        self.last_error = None
+
+        # version -> predictor, in load order; the active one is always among them
+        self._versions = OrderedDict()
+        self._predictor = None
+        # Shared with every registry watching the same file; see _read_pin
+        self.pin_path = model_path + '.pin'
+        self.archive_dir = model_path + '.versions'
+        self._failed = set()
+        self._lock = threading.Lock()
+        # Serializes loads so the watcher and an explicit reload never load the same file twice
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stopping = threading.Event()
+
+    @property
+    def loaded(self):
+        """Whether the model has already been loaded in this process"""
+        return self._predictor is not None
+
+    @property
+    def model_version(self):
+        """Version of the active model (loads it if needed)"""
+        return self.get().model_version
+
+    def get(self):
+        """
+        Return the active predictor, loading and warming it up on the first call
+
+        Hold on to the returned object for the duration of a request: it stays
+        usable even if a newer version is activated meanwhile.
+
+        Returns:
+            ISLModelPredictor instance
+        """
+        predictor = self._predictor
+        if predictor is not None:
+            return predictor
+
+        with self._load_lock:
+            if self._predictor is None:
+                pin = self._read_pin()
+                predictor = self._load_archived(pin['version']) if pin is not None else None
+                self._install(predictor or self._load(), activate=True)
+            self._ensure_watching()
+            return self._predictor
+
+    def predict_batch(self, batch):
+        """
+        Run a batch on whichever version is active now
+
+        For long-lived callers such as a webcam stream, which should follow model swaps
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3) with values in [0, 1]
+
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        return self.get().predict_batch(batch)
+
+    def warm_up(self):
+        """Load the model eagerly, e.g. from an inference worker's startup hook"""
+        self.get()
+
+    def reload(self):
+        """
+        Load model_path now and make it the active version
+
+        The current version keeps serving until the new one is loaded and warmed up.
+        Clears a rollback pin, for every process sharing the file.
+
+        Returns:
+            Version string of the newly active model
+
+        Raises:
+            Exception: Whatever the backend raised while loading; the active version is left in place
+        """
+        with self._load_lock:
+            version = model_file_version(self.model_path)
+            predictor = self._versions.get(version)
+            if predictor is None:
+                try:
+                    predictor = self._load()
+                except Exception as e:
+                    with self._lock:
+                        self._failed.add(version)
+                        self.load_failures += 1
+                        self.last_error = repr(e)
+                    raise
+            self._install(predictor, activate=True)
+            self._clear_pin()
+            with self._lock:
+                self.reloads += 1
+            self._ensure_watching()
+            return predictor.model_version
+
+    def rollback(self, version=None):
+        """
+        Make an earlier loaded version active again without reloading anything
+
+        The version is pinned in '<model_path>.pin': no watcher re-promotes the file on
+        disk until it is replaced again, and other processes switch to the pinned version
+        within one watch interval (or on their next start).
+
+        Args:
+            version: Version to activate; defaults to the one loaded before the active version
+
+        Returns:
+            Version string of the now active model
+
+        Raises:
+            ValueError: If the version is not loaded in this process
+        """
+        with self._lock:
+            loaded = list(self._versions)
+            if version is None:
+                current = self._predictor.model_version if self._predictor is not None else None
+                earlier = loaded[:loaded.index(current)] if current in loaded else []
+                if not earlier:
+                    raise ValueError('No earlier model version is loaded')
+                version = earlier[-1]
+            predictor = self._versions.get(version)
+            if predictor is None:
+                raise ValueError(f"Model version {version!r} is not loaded; loaded versions: {loaded}")
+            self._predictor = predictor
+            self.rollbacks += 1
+        try:
+            self._write_pin(version, model_file_version(self.model_path))
+        except OSError as e:
+            # Still active here; only the other processes and a restart will not follow
+            with self._lock:
+                self.last_error = repr(e)
+        return version
+
+    def versions(self):
+        """
+        List the versions loaded in this process
+
+        Returns:
+            List of {'version', 'active'} dictionaries, oldest first
+        """
+        with self._lock:
+            active = self._predictor
+            return [{'version': version, 'active': predictor is active}
+                    for version, predictor in self._versions.items()]
+
+    def stats(self):
+        """
+        Report the registry's state
+
+        Returns:
+            Dictionary with the active version, loaded versions, the pinned version and reload counters
+        """
+        pin = self._read_pin()
+        with self._lock:
+            return {
+                'active_version': self._predictor.model_version if self._predictor is not None else None,
+                'loaded_versions': list(self._versions),
+                'pinned_version': pin['version'] if pin is not None else None,
+                'watching': self._watcher is not None,
+                'reloads': self.reloads,
+                'rollbacks': self.rollbacks,
+                'load_failures': self.load_failures,
+                'last_error': self.last_error
+            }
+
+    def close(self):
+        """Stop watching model_path; loaded versions stay usable"""
+        self._stopping.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.join()
+
+    def _load(self, path=None):
+        # Deferred so the web tier never imports TensorFlow/OpenCV unless it predicts
+        from utils.model_utils import ISLModelPredictor
+
+        # warm_up runs a dummy inference, so the first request on a new version is not slowed by tracing
+        predictor = ISLModelPredictor(path or self.model_path, backend=self.backend, num_threads=self.num_threads)
+        if path is None:
+            self._archive(predictor.model_version)
+        return predictor
+
+    def _archived_path(self, version):
+        # Keeps the extension, which selects the backend
+        return os.path.join(self.archive_dir, version + os.path.splitext(self.model_path)[1])
+
+    def _archive(self, version):
+        # A hard link keeps size and mtime, so the archived copy has the same version string
+        path = self._archived_path(version)
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            if not os.path.exists(path):
+                staged = f'{path}.{os.getpid()}.tmp'
+                try:
+                    os.link(self.model_path, staged)
+                except OSError:
+                    shutil.copy2(self.model_path, staged)
+                os.replace(staged, path)
+            if model_file_version(path) != version:
+                # The file was replaced between loading and archiving; archive the next load instead
+                os.remove(path)
+                return
+            pinned = self._read_pin()
+            kept = {version, pinned['version'] if pinned is not None else None}
+            archived = sorted((entry.path for entry in os.scandir(self.archive_dir)
+                               if not entry.name.endswith('.tmp')), key=os.path.getmtime)
+            for stale in archived[:max(0, len(archived) - self.keep_versions)]:
+                if os.path.splitext(os.path.basename(stale))[0] not in kept:
+                    os.remove(stale)
+        except OSError as e:
+            # Serving does not depend on the archive; only a rollback in another process would miss it
+            with self._lock:
+                self.last_error = repr(e)
+
+    def _load_archived(self, version):
+        path = self._archived_path(version)
+        try:
+            if version in self._failed or model_file_version(path) != version:
+                return None
+        except OSError:
+            # Pruned or never archived; model_path serves instead
+            return None
+        try:
+            return self._load(path)
+        except Exception as e:
+            # Falls back to model_path; the pin is cleared once that file changes or reload() runs
+            with self._lock:
+                self._failed.add(version)
+                self.load_failures += 1
+                self.last_error = repr(e)
+            return None
+
+    def _read_pin(self):
+        # A pin only holds while model_path is the file that was on disk when it was written
+        try:
+            with open(self.pin_path) as f:
+                pin = json.load(f)
+            if pin.get('file_version') == model_file_version(self.model_path):
+                return pin
+        except (OSError, ValueError, AttributeError):
+            pass
+        return None
+
+    def _write_pin(self, version, file_version):
+        staged = f'{self.pin_path}.{os.getpid()}.tmp'
+        with open(staged, 'w') as f:
+            json.dump({'version': version, 'file_version': file_version}, f)
+        # Renamed into place so no reader ever sees half a pin
+        os.replace(staged, self.pin_path)
+
+    def _clear_pin(self):
+        try:
+            os.remove(self.pin_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            with self._lock:
+                self.last_error = repr(e)
+
+    def _install(self, predictor, activate):
+        with self._lock:
+            self._versions[predictor.model_version] = predictor
+            self._versions.move_to_end(predictor.model_version)
+            if activate:
+                # The swap: requests that start from here on get the new version
+                self._predictor = predictor
+            # Evicted predictors are freed once the batches still holding them finish
+            while len(self._versions) > self.keep_versions:
+                oldest = next(version for version, kept in self._versions.items() if kept is not self._predictor)
+                del self._versions[oldest]
+
+    def _ensure_watching(self):
+        # Started only once a model is loaded, so a process that never predicts never loads one
+        if self.watch_interval <= 0 or self._watcher is not None or self._stopping.is_set():
+            return
+        self._watcher = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        seen = None
+        while not self._stopping.wait(self.watch_interval):
+            try:
+                version = model_file_version(self.model_path)
+            except OSError:
+                # Mid-replacement or briefly missing; look again on the next tick
+                seen = None
+                continue
+            pin = self._read_pin()
+            if pin is not None:
+                # Another process rolled back; follow it instead of promoting the file
+                seen = version
+                self._follow_pin(pin['version'])
+                continue
+            with self._lock:
+                current = self._predictor.model_version if self._predictor is not None else None
+                ignored = version == current or version in self._failed
+            if ignored:
+                seen = version
+                continue
+            if version != seen:
+                # A file still being copied changes size or mtime between checks; wait until it settles
+                seen = version
+                continue
+            try:
+                self.reload()
+            except Exception:
+                # Recorded by reload(); the active version keeps serving
+                pass
+
+    def _follow_pin(self, version):
+        with self._lock:
+            predictor = self._versions.get(version)
+            if predictor is self._predictor:
+                return
+            if predictor is not None:
+                self._predictor = predictor
+                return
+        with self._load_lock:
+            predictor = self._load_archived(version)
+            if predictor is not None:
+                self._install(predictor, activate=True)
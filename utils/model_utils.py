@@ -1,32 +1,46 @@
 import os
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 from PIL import Image
-import cv2
+from utils.backends import load_backend
+from utils.labels import load_labels
+from utils.preprocessing import load_image_tensor, array_to_tensor
+from utils.prediction_cache import content_hash, model_file_version
+from utils.prediction_result import top_k_results
 
 class ISLModelPredictor:
     """Utility class for handling sign language model predictions"""
     
-    def __init__(self, model_path):
+    def __init__(self, model_path, warm_up=True, backend=None, num_threads=None, cache=None, top_k=3):
         """
         Initialize the predictor with a trained model
         
         Args:
-            model_path: Path to the saved Keras model
+            model_path: Path to the saved model (.keras, .tflite or .onnx)
+            warm_up: Run one dummy inference so the first real prediction is not slowed by tracing
+            backend: Runtime backend name ('keras', 'tflite', 'onnx'); inferred from model_path when None
+            num_threads: Number of CPU threads for the TFLite and ONNX runtimes
+            cache: Optional PredictionCache consulted before running the model
+            top_k: Number of best classes each prediction keeps
         """
-        self.model = load_model(model_path)
         self.img_height = 64
         self.img_width = 64
+        self.cache = cache
+        self.top_k = top_k
+        # Read before loading so the version describes the file the weights actually came from
+        self.model_version = model_file_version(model_path)
+        self.backend = load_backend(
+            model_path,
+            backend=backend,
+            input_shape=(self.img_height, self.img_width, 3),
+            num_threads=num_threads
+        )
+        # Only the Keras backend exposes the underlying model object
+        self.model = getattr(self.backend, 'model', None)
+        if warm_up:
+            self.backend.warm_up()
         
-        # Class labels (ensure these match your model's classes)
-        self.class_labels = [
-            'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 
-            'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 
-            'U', 'V', 'W', 'X', 'Y', 'Z', '1', '2', '3', '4', 
-            '5', '6', '7', '8', '9'  # Adjust based on your dataset
-        ]
+        # Class labels, in model output order (see Config.LABELS_PATH)
+        self.class_labels = load_labels()
     
     def preprocess_image(self, img_path):
         """
@@ -38,10 +52,9 @@ class ISLModelPredictor:
         Returns:
             Preprocessed image array ready for model input
         """
-        img = image.load_img(img_path, target_size=(self.img_height, self.img_width))
-        img_array = image.img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0)
-        img_array = img_array / 255.0  # Normalize
+        # Same nearest-neighbour resize keras.preprocessing.image.load_img used, without importing TensorFlow
+        img_array = np.empty((1, self.img_height, self.img_width, 3), dtype=np.float32)
+        load_image_tensor(img_path, (self.img_width, self.img_height), Image.NEAREST, out=img_array[0])
         
         return img_array
     
@@ -55,73 +68,81 @@ class ISLModelPredictor:
         Returns:
             Preprocessed image array ready for model input
         """
-        img = cv2.resize(img_array, (self.img_height, self.img_width))
-        img = img / 255.0  # Normalize
-        img = np.expand_dims(img, axis=0)
+        img = np.empty((1, self.img_height, self.img_width, 3), dtype=np.float32)
+        array_to_tensor(img_array, (self.img_width, self.img_height), out=img[0])
         
         return img
     
-    def predict(self, img_path):
+    def predict_batch(self, batch):
+        """
+        Run the model on a batch of already preprocessed images
+        
+        Args:
+            batch: Array of shape (N, 64, 64, 3) with values in [0, 1]
+            
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        return self.backend.predict(batch)
+    
+    def predict(self, img_path, all_probabilities=False):
         """
         Make a prediction from an image file
         
         Args:
             img_path: Path to the image file
+            all_probabilities: Also keep the full probability distribution
             
         Returns:
-            Dictionary with predicted class and confidence
+            PredictionResult with predicted class, confidence and top-k
         """
         img_array = self.preprocess_image(img_path)
-        predictions = self.model.predict(img_array)
-        
-        # Get the predicted class index and confidence
-        pred_class_idx = np.argmax(predictions[0])
-        confidence = float(predictions[0][pred_class_idx])
-        
-        return {
-            'predicted_class': self.class_labels[pred_class_idx],
-            'confidence': confidence,
-            'all_probabilities': {self.class_labels[i]: float(predictions[0][i]) for i in range(len(self.class_labels))}
-        }
+        return self._predict_tensor(img_array, all_probabilities)
     
-    def predict_from_array(self, img_array):
+    def predict_from_array(self, img_array, all_probabilities=False):
         """
         Make a prediction from an image array
         
         Args:
             img_array: NumPy array of image
+            all_probabilities: Also keep the full probability distribution
             
         Returns:
-            Dictionary with predicted class and confidence
+            PredictionResult with predicted class, confidence and top-k
         """
         processed_img = self.preprocess_image_from_array(img_array)
-        predictions = self.model.predict(processed_img)
-        
-        # Get the predicted class index and confidence
-        pred_class_idx = np.argmax(predictions[0])
-        confidence = float(predictions[0][pred_class_idx])
-        
-        return {
-            'predicted_class': self.class_labels[pred_class_idx],
-            'confidence': confidence,
-            'all_probabilities': {self.class_labels[i]: float(predictions[0][i]) for i in range(len(self.class_labels))}
-        }
+        return self._predict_tensor(processed_img, all_probabilities)
     
-    def process_video_frame(self, frame):
+    def process_video_frame(self, frame, all_probabilities=False):
         """
         Process a single video frame for sign language detection
         
         Args:
             frame: NumPy array representing a video frame
+            all_probabilities: Also keep the full probability distribution
             
         Returns:
-            Dictionary with predicted class and confidence
+            PredictionResult with predicted class, confidence and top-k
         """
-        # Convert BGR to RGB (OpenCV uses BGR by default)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Resize first, then convert BGR to RGB on the small image (OpenCV uses BGR by default)
+        processed_img = np.empty((1, self.img_height, self.img_width, 3), dtype=np.float32)
+        array_to_tensor(frame, (self.img_width, self.img_height), bgr=True, out=processed_img[0])
+        return self._predict_tensor(processed_img, all_probabilities)
+    
+    def _predict_tensor(self, processed_img, all_probabilities=False):
+        # Keyed on the normalised tensor, so identical pixels hit whichever method they came through
+        key = content_hash(processed_img) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key, self.model_version)
+            # A compact cached result cannot answer a request for the full distribution
+            if cached is not None and (cached.probabilities is not None or not all_probabilities):
+                return cached
         
-        # Preprocess and predict
-        return self.predict_from_array(frame_rgb)
+        predictions = self.backend.predict(processed_img)
+        result = top_k_results(predictions, self.class_labels, self.top_k, all_probabilities, self.model_version)[0]
+        if key is not None:
+            self.cache.put(key, self.model_version, result)
+        return result
 
 # Example usage
 if __name__ == "__main__":
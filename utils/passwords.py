@@ -0,0 +1,119 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusyError(Exception):
+    """Raised when too many password hashes are already queued; the caller should retry later"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated executor with a cap on queued work"""
+
+    def __init__(self, method='pbkdf2:sha256:260000', salt_length=16, max_workers=2, max_pending=8):
+        """
+        Initialize the hasher; worker threads start on first use
+
+        Args:
+            method: Werkzeug hash method with its cost, e.g. 'pbkdf2:sha256:260000'
+            salt_length: Salt length in characters
+            max_workers: Hashes computed at the same time; caps the CPU logins can take from inference
+            max_pending: Hashes allowed in flight (running or queued) before HashingBusyError is raised
+        """
+        self.method = method
+        self.salt_length = salt_length
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending))
+        self.rejected = 0
+        self.upgraded = 0
+        self._capacity = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hash')
+
+    def hash(self, password):
+        """
+        Hash a password with the configured method
+
+        Args:
+            password: Plain-text password
+
+        Returns:
+            Werkzeug hash string ('method$salt$hash')
+
+        Raises:
+            HashingBusyError: If max_pending hashes are already in flight
+        """
+        return self._run(generate_password_hash, password, method=self.method, salt_length=self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """
+        Check a password against a stored hash
+
+        Args:
+            stored_hash: Hash string from the database
+            password: Plain-text password to check
+
+        Returns:
+            (matches, new_hash) tuple; new_hash is a replacement made with the configured
+            parameters when the password matched a hash made with other ones, else None
+            (also None when the hasher was too busy to make one)
+
+        Raises:
+            HashingBusyError: If max_pending hashes are already in flight for the check itself
+        """
+        if not self._run(check_password_hash, stored_hash, password):
+            return False, None
+        if not self.needs_rehash(stored_hash):
+            return True, None
+        # The plain-text password is only available now, so this is the one chance to upgrade;
+        # it is best-effort, so a busy executor skips it rather than failing a login that already succeeded
+        try:
+            new_hash = self.hash(password)
+        except HashingBusyError:
+            return True, None
+        self.upgraded += 1
+        return True, new_hash
+
+    def needs_rehash(self, stored_hash):
+        """
+        Whether a stored hash was made with other parameters than the configured ones
+
+        Args:
+            stored_hash: Hash string from the database
+
+        Returns:
+            True if the method, iteration count or salt length differ
+        """
+        method, _, rest = stored_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def stats(self):
+        """
+        Report the hasher's settings and how often it pushed back
+
+        Returns:
+            Dictionary with the method, limits, rejected and upgraded counts
+        """
+        return {
+            'method': self.method,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'upgraded': self.upgraded
+        }
+
+    def close(self):
+        """Stop the worker threads after the queued hashes finish"""
+        self._executor.shutdown(wait=True)
+
+    def _run(self, fn, *args, **kwargs):
+        # Refuse rather than queue without bound: a login burst must not tie up every web thread
+        if not self._capacity.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusyError('Too many logins in progress, please retry shortly')
+        try:
+            # hashlib's PBKDF2 releases the GIL, so only max_workers cores are ever busy hashing
+            return self._executor.submit(fn, *args, **kwargs).result()
+        finally:
+            self._capacity.release()
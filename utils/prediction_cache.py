@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """
+    Hash raw upload bytes or a tensor's buffer
+
+    Args:
+        data: bytes-like object (a contiguous NumPy array works too)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_file_version(model_path):
+    """
+    Identify the exact model file a predictor was loaded from
+
+    Args:
+        model_path: Path to the saved model
+
+    Returns:
+        String that changes whenever the file is replaced or rewritten
+    """
+    stat = os.stat(model_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU cache of prediction results keyed by content hash"""
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Number of results kept before the least recently used is evicted
+            ttl_seconds: Age after which an entry is treated as a miss; 0 or None keeps entries until evicted
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds) if ttl_seconds else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, key, model_version):
+        """
+        Look up a cached result
+
+        Args:
+            key: Content hash of the input
+            model_version: Version of the model that would serve the request
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, model_version, result):
+        """
+        Store a result, evicting the least recently used entry when full
+
+        Args:
+            key: Content hash of the input
+            model_version: Version of the model that produced the result
+            result: PredictionResult; it is shared with later hits, so it must not be mutated
+        """
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            Dictionary with hits, misses, hit_rate and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+    def _check_version(self, model_version):
+        # Results from a previous model must never be served, so a new version empties the cache
+        if model_version != self._version:
+            self._entries.clear()
+            self._version = model_version
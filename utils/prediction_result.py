@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class PredictionResult:
+    """Top-k prediction for one sample, backed by small NumPy arrays instead of per-class dicts"""
+
+    __slots__ = ('labels', 'indices', 'scores', 'probabilities', 'model_version')
+
+    def __init__(self, labels, indices, scores, probabilities=None, model_version=None):
+        """
+        Wrap the top-k of one probability vector
+
+        Args:
+            labels: Class labels indexed by model output (shared, never copied)
+            indices: Class indices of the top-k, best first
+            scores: Probabilities of the top-k, best first
+            probabilities: Full probability vector, only kept when requested
+            model_version: Version of the model that produced the scores, when known
+        """
+        self.labels = labels
+        self.indices = indices
+        self.scores = scores
+        self.probabilities = probabilities
+        self.model_version = model_version
+
+    @property
+    def predicted_class(self):
+        return self.labels[int(self.indices[0])]
+
+    @property
+    def confidence(self):
+        return float(self.scores[0])
+
+    @property
+    def top_k(self):
+        """List of (label, probability) pairs, best first"""
+        return [(self.labels[int(i)], float(s)) for i, s in zip(self.indices, self.scores)]
+
+    @property
+    def all_probabilities(self):
+        """Label to probability mapping, or None when the full distribution was not requested"""
+        if self.probabilities is None:
+            return None
+        return {label: float(p) for label, p in zip(self.labels, self.probabilities)}
+
+    def __getitem__(self, key):
+        # Keeps result['predicted_class'] / result['confidence'] working for dict-style callers
+        if key in ('predicted_class', 'confidence', 'top_k', 'all_probabilities', 'model_version'):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def to_dict(self):
+        """
+        JSON-ready form of the result
+
+        Returns:
+            Dictionary with predicted_class, confidence, top_k and, when known, all_probabilities
+            and model_version
+        """
+        result = {
+            'predicted_class': self.predicted_class,
+            'confidence': self.confidence,
+            'top_k': [{'label': label, 'confidence': score} for label, score in self.top_k]
+        }
+        if self.probabilities is not None:
+            result['all_probabilities'] = self.all_probabilities
+        if self.model_version is not None:
+            result['model_version'] = self.model_version
+        return result
+
+
+def top_k_results(predictions, labels, k=3, all_probabilities=False, model_version=None):
+    """
+    Build results for a whole batch with one partial sort
+
+    Args:
+        predictions: Array of shape (N, num_classes) with class probabilities
+        labels: Class labels indexed by model output
+        k: Number of best classes kept per sample
+        all_probabilities: Also keep each sample's full probability vector
+        model_version: Version of the model that produced the batch, attached to every result
+
+    Returns:
+        List of N PredictionResult
+    """
+    predictions = np.asarray(predictions)
+    k = max(1, min(int(k), predictions.shape[1]))
+    if k == 1:
+        top = np.argmax(predictions, axis=1)[:, np.newaxis]
+    else:
+        # argpartition finds the k best in O(num_classes); only those k are then sorted
+        top = np.argpartition(predictions, -k, axis=1)[:, -k:]
+        order = np.argsort(np.take_along_axis(predictions, top, axis=1), axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+    scores = np.take_along_axis(predictions, top, axis=1)
+    return [
+        PredictionResult(labels, top[i], scores[i], predictions[i] if all_probabilities else None, model_version)
+        for i in range(len(predictions))
+    ]
@@ -0,0 +1,250 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+# Spatial size (width, height) the model was trained on
+MODEL_INPUT_SIZE = (64, 64)
+
+# Modes that resize correctly before the RGB conversion; palette images must be converted first
+_RESIZE_BEFORE_CONVERT_MODES = {'RGB', 'RGBA', 'L', 'LA', 'RGBX', 'CMYK', 'YCbCr'}
+
+
+def read_upload(file_storage):
+    """
+    Read an uploaded file into memory without touching the filesystem
+
+    Args:
+        file_storage: werkzeug FileStorage from request.files
+
+    Returns:
+        Raw bytes of the upload
+    """
+    return file_storage.read()
+
+
+def normalize(img_array, out=None):
+    """
+    Scale a uint8 image to float32 in [0, 1] in a single pass
+
+    Args:
+        img_array: uint8 array of shape (height, width, 3)
+        out: Optional preallocated float32 array of the same shape to write into
+
+    Returns:
+        float32 array with values in [0, 1] (out, when given)
+    """
+    if out is None:
+        out = np.empty(img_array.shape, dtype=np.float32)
+    # Writes straight into float32, never materialising a float64 intermediate
+    np.multiply(img_array, np.float32(1.0 / 255.0), out=out, dtype=np.float32)
+    return out
+
+
+def decode_image(source, size=MODEL_INPUT_SIZE, resample=Image.BICUBIC):
+    """
+    Decode an image at (close to) the size the model needs and return it as RGB
+
+    JPEGs are decoded through the DCT-scaling draft mode, which skips up to 7/8 of
+    the pixels of a large photo or webcam frame and emits RGB straight from libjpeg.
+
+    Args:
+        source: Encoded image bytes, a file path or a binary file object
+        size: (width, height) to resize to
+        resample: PIL resampling filter for the final resize
+
+    Returns:
+        uint8 array of shape (height, width, 3)
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    with Image.open(source) as img:
+        if img.format == 'JPEG':
+            # Picks the largest power-of-two reduction that still covers size
+            img.draft('RGB', size)
+
+        if img.mode in _RESIZE_BEFORE_CONVERT_MODES:
+            # Resizing first means the colour conversion only touches size[0] * size[1] pixels
+            img = img.resize(size, resample)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+        else:
+            img = img.convert('RGB').resize(size, resample)
+
+        return np.asarray(img)
+
+
+def load_image_tensor(source, size=MODEL_INPUT_SIZE, resample=Image.BICUBIC, out=None):
+    """
+    Decode an encoded image into a model input tensor
+
+    Args:
+        source: Encoded image bytes (PNG, JPEG, GIF, ...), a file path or a binary file object
+        size: (width, height) the model expects
+        resample: PIL resampling filter for the final resize
+        out: Optional preallocated float32 array of shape (height, width, 3) to write into
+
+    Returns:
+        float32 array of shape (height, width, 3) with values in [0, 1]
+    """
+    return normalize(decode_image(source, size, resample), out=out)
+
+
+def array_to_tensor(img_array, size=MODEL_INPUT_SIZE, bgr=False, out=None):
+    """
+    Turn a decoded frame (e.g. from OpenCV) into a model input tensor
+
+    Args:
+        img_array: uint8 array of shape (height, width, 3)
+        size: (width, height) the model expects
+        bgr: Whether the frame is in OpenCV's BGR channel order
+        out: Optional preallocated float32 array of shape (height, width, 3) to write into
+
+    Returns:
+        float32 array of shape (height, width, 3) with values in [0, 1]
+    """
+    import cv2
+
+    img = cv2.resize(img_array, size)
+    if bgr:
+        # Converting after the resize swaps channels on 64x64 pixels instead of the full frame
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return normalize(img, out=out)
+
+
+def jpeg_size(data):
+    """
+    Read a JPEG's dimensions from its frame header without decoding it
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        (width, height) tuple, or None if the bytes are not a JPEG with a readable frame header
+    """
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        if marker in (0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7):
+            # Standalone markers carry no length
+            offset += 2
+            continue
+        length = int.from_bytes(data[offset + 2:offset + 4], 'big')
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if offset + 9 > len(data):
+                return None
+            height = int.from_bytes(data[offset + 5:offset + 7], 'big')
+            width = int.from_bytes(data[offset + 7:offset + 9], 'big')
+            return width, height
+        offset += 2 + length
+    return None
+
+
+def decode_frame(data, size=MODEL_INPUT_SIZE):
+    """
+    Decode an encoded webcam frame into an OpenCV BGR array, reduced as far as the model input allows
+
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale when the header shows the result still covers
+    size, which skips most of the IDCT work; smaller JPEGs and other formats decode at full size.
+
+    Args:
+        data: Encoded frame bytes (JPEG or PNG)
+        size: (width, height) the frame will be resized to afterwards
+
+    Returns:
+        uint8 array of shape (height, width, 3) in BGR order, or None if the bytes are not an image
+    """
+    import cv2
+
+    if not data:
+        return None
+    flags = cv2.IMREAD_COLOR
+    dimensions = jpeg_size(data)
+    if dimensions is not None:
+        width, height = dimensions
+        for factor, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if width >= size[0] * factor and height >= size[1] * factor:
+                flags = reduced
+                break
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(buffer, flags)
+
+
+def raw_frame_size(size=MODEL_INPUT_SIZE):
+    """
+    Number of bytes in a raw RGB frame at the given size
+
+    Args:
+        size: (width, height) of the frame
+
+    Returns:
+        width * height * 3
+    """
+    return size[0] * size[1] * 3
+
+
+def raw_to_array(data, size=MODEL_INPUT_SIZE):
+    """
+    View a raw RGB upload (row-major, 3 bytes per pixel, as drawn on a browser canvas) as an image
+
+    No decoder runs and nothing is copied; the returned array is read-only.
+
+    Args:
+        data: Exactly width * height * 3 bytes
+        size: (width, height) of the frame
+
+    Returns:
+        uint8 array of shape (height, width, 3) in RGB order
+
+    Raises:
+        ValueError: If data has the wrong length
+    """
+    expected = raw_frame_size(size)
+    if len(data) != expected:
+        raise ValueError(f'Raw frames must be exactly {expected} bytes ({size[0]}x{size[1]} RGB), got {len(data)}')
+    return np.frombuffer(data, dtype=np.uint8).reshape(size[1], size[0], 3)
+
+
+def raw_to_tensor(data, size=MODEL_INPUT_SIZE, out=None):
+    """
+    Turn a raw RGB upload straight into a model input tensor
+
+    Args:
+        data: Exactly width * height * 3 bytes at the model input size
+        size: (width, height) the model expects
+        out: Optional preallocated float32 array of shape (height, width, 3) to write into
+
+    Returns:
+        float32 array of shape (height, width, 3) with values in [0, 1]
+
+    Raises:
+        ValueError: If data has the wrong length
+    """
+    return normalize(raw_to_array(data, size), out=out)
+
+
+def raw_to_png(data, size=MODEL_INPUT_SIZE):
+    """
+    Encode a raw RGB frame as PNG so it can be kept like any other upload
+
+    Args:
+        data: Exactly width * height * 3 bytes
+        size: (width, height) of the frame
+
+    Returns:
+        PNG bytes
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(raw_to_array(data, size)).save(buffer, 'PNG')
+    return buffer.getvalue()
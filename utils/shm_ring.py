@@ -0,0 +1,89 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedSlotRing:
+    """Fixed-size array slots in one shared memory block, handed between processes by index"""
+
+    def __init__(self, num_slots, slot_shape, dtype=np.float32, name=None):
+        """
+        Create the ring in the owning process, or attach to an existing one when name is given
+
+        Args:
+            num_slots: Number of slots
+            slot_shape: Largest array shape a slot can hold
+            dtype: Element type of every slot
+            name: Name of an existing block to attach to (worker side)
+        """
+        self.num_slots = int(num_slots)
+        self.slot_shape = tuple(slot_shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_size = int(np.prod(self.slot_shape))
+        nbytes = self.num_slots * self.slot_size * self.dtype.itemsize
+
+        self.owner = name is None
+        if self.owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._slots = np.ndarray((self.num_slots, self.slot_size), dtype=self.dtype, buffer=self._shm.buf)
+
+        # Only the owner hands out slots; workers just read the indices they are sent
+        self._free = list(range(self.num_slots - 1, -1, -1)) if self.owner else None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        """Name other processes use to attach to this block"""
+        return self._shm.name
+
+    def describe(self):
+        """Arguments a worker process passes to SharedSlotRing to attach"""
+        return {'num_slots': self.num_slots, 'slot_shape': self.slot_shape, 'dtype': self.dtype.str, 'name': self.name}
+
+    def fits(self, shape):
+        """Whether an array of this shape fits in one slot"""
+        return int(np.prod(shape)) <= self.slot_size
+
+    def acquire(self):
+        """
+        Reserve a free slot
+
+        Returns:
+            Slot index, or None when every slot is in use
+        """
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, index):
+        """Return a slot to the free list once its consumer is done with it"""
+        with self._lock:
+            self._free.append(index)
+
+    def view(self, index, shape=None):
+        """
+        Array view onto a slot; writing to it writes straight into shared memory
+
+        Args:
+            index: Slot index
+            shape: Shape to view the slot as; defaults to the full slot shape
+
+        Returns:
+            NumPy array backed by the shared block (no copy)
+        """
+        shape = self.slot_shape if shape is None else tuple(shape)
+        return self._slots[index, :int(np.prod(shape))].reshape(shape)
+
+    def free_slots(self):
+        """Number of slots currently available"""
+        with self._lock:
+            return len(self._free) if self._free is not None else 0
+
+    def close(self):
+        """Detach from the block; the owner also frees it"""
+        self._slots = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
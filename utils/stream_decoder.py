@@ -0,0 +1,147 @@
+import numpy as np
+
+from utils.preprocessing import array_to_tensor
+
+# Emitted into the text when the signer pauses
+GAP = ' '
+
+
+class SignStreamDecoder:
+    """Turns a live stream of frames into stable letters for one client session"""
+
+    def __init__(self, predictor, class_labels, smoothing='ema', window=8, alpha=0.5, stable_frames=3,
+                 min_confidence=0.6, gap_frames=5, diff_threshold=3.0):
+        """
+        Initialize the decoder state
+
+        Args:
+            predictor: Object with predict_batch(batch) -> (N, num_classes) probabilities
+                (ISLModelPredictor or InferenceWorkerPool)
+            class_labels: List of class labels indexed by model output
+            smoothing: 'ema' (exponential moving average) or 'majority' (vote over the window)
+            window: Number of recent probability vectors kept
+            alpha: Weight of the newest frame in the EMA
+            stable_frames: Consecutive smoothed frames a letter needs before it is emitted
+            min_confidence: Smoothed confidence below which a frame counts as blank
+            gap_frames: Consecutive blank frames that end a word
+            diff_threshold: Mean absolute pixel change (0-255) below which a frame reuses the last result
+        """
+        if smoothing not in ('ema', 'majority'):
+            raise ValueError(f"Unknown smoothing '{smoothing}'. Choose 'ema' or 'majority'")
+        self.predictor = predictor
+        self.class_labels = class_labels
+        self.smoothing = smoothing
+        self.alpha = alpha
+        self.stable_frames = stable_frames
+        self.min_confidence = min_confidence
+        self.gap_frames = gap_frames
+        self.diff_threshold = diff_threshold
+        self._history = np.zeros((window, len(class_labels)), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget the decoded text and all smoothing state"""
+        self.text = ''
+        self.frames = 0
+        self.model_calls = 0
+        self._history[:] = 0.0
+        self._filled = 0
+        self._position = 0
+        self._ema = None
+        self._last_probabilities = None
+        self._last_signature = None
+        self._candidate = None
+        self._candidate_run = 0
+        self._blank_run = 0
+        self._last_emitted = None
+
+    def process(self, frame):
+        """
+        Feed one BGR frame and advance the decoder
+
+        Args:
+            frame: NumPy array representing a video frame (OpenCV BGR order)
+
+        Returns:
+            Dictionary with the smoothed prediction and confidence, the letter emitted by
+            this frame (or None), the decoded text so far and whether inference was skipped
+        """
+        self.frames += 1
+        signature = self._signature(frame)
+        skipped = (
+            self._last_probabilities is not None
+            and float(np.mean(np.abs(signature - self._last_signature))) < self.diff_threshold
+        )
+        if skipped:
+            probabilities = self._last_probabilities
+        else:
+            tensor = array_to_tensor(frame, bgr=True)
+            probabilities = np.asarray(self.predictor.predict_batch(tensor[np.newaxis]))[0]
+            self.model_calls += 1
+            self._last_probabilities = probabilities
+            self._last_signature = signature
+
+        idx, confidence = self._smooth(probabilities)
+        emitted = self._advance(idx, confidence)
+        return {
+            'prediction': self.class_labels[idx] if confidence >= self.min_confidence else None,
+            'confidence': confidence,
+            'emitted': emitted,
+            'text': self.text,
+            'skipped': skipped
+        }
+
+    @staticmethod
+    def _signature(frame):
+        # 16x16 grayscale thumbnail: enough to notice a moving hand, cheap enough for every frame
+        import cv2
+
+        small = cv2.resize(frame, (16, 16), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.float32)
+
+    def _smooth(self, probabilities):
+        self._history[self._position] = probabilities
+        self._position = (self._position + 1) % len(self._history)
+        self._filled = min(self._filled + 1, len(self._history))
+
+        if self.smoothing == 'ema':
+            if self._ema is None:
+                self._ema = probabilities.astype(np.float32)
+            else:
+                self._ema = self.alpha * probabilities + (1.0 - self.alpha) * self._ema
+            idx = int(np.argmax(self._ema))
+            return idx, float(self._ema[idx])
+
+        recent = self._history[:self._filled]
+        votes = np.bincount(np.argmax(recent, axis=1), minlength=recent.shape[1])
+        idx = int(np.argmax(votes))
+        # Confidence of a vote is the share of the window that agrees, times the mean probability
+        return idx, float(votes[idx] / self._filled * recent[:, idx].mean())
+
+    def _advance(self, idx, confidence):
+        if confidence < self.min_confidence:
+            self._candidate = None
+            self._candidate_run = 0
+            self._blank_run += 1
+            if self._blank_run == self.gap_frames and self.text and not self.text.endswith(GAP):
+                # A pause ends the word; the same letter may be signed again after it
+                self.text += GAP
+                self._last_emitted = None
+                return GAP
+            return None
+
+        self._blank_run = 0
+        if idx == self._candidate:
+            self._candidate_run += 1
+        else:
+            self._candidate = idx
+            self._candidate_run = 1
+
+        if self._candidate_run == self.stable_frames and idx != self._last_emitted:
+            letter = self.class_labels[idx]
+            self.text += letter
+            self._last_emitted = idx
+            return letter
+        return None
@@ -0,0 +1,301 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from utils.database import upsert
+
+# Names written by the store: '<sha256>.<ext>', optionally under its 'ab/cd/' shard directories
+_CONTENT_ADDRESSED = re.compile(r'^(?:[0-9a-f]{2}/[0-9a-f]{2}/)?[0-9a-f]{64}\.[a-z0-9]+$')
+
+
+class UploadStore:
+    """Persists uploads off the request path, content-addressed in sharded directories, with thumbnails"""
+
+    THUMBNAIL_DIR = 'thumbs'
+
+    def __init__(self, upload_folder, max_workers=2, thumbnail_size=128):
+        """
+        Initialize the store
+
+        Args:
+            upload_folder: Directory the uploads are written to
+            max_workers: Number of background threads doing the writes
+            thumbnail_size: Longest side in pixels of the thumbnails made for image uploads
+        """
+        self.upload_folder = upload_folder
+        self.max_workers = max_workers
+        self.thumbnail_size = thumbnail_size
+        self._executor = None
+        self._lock = threading.Lock()
+        os.makedirs(upload_folder, exist_ok=True)
+
+    @staticmethod
+    def filename_for(data, extension, digest=None):
+        """
+        Name an upload after its content so identical uploads share one file
+
+        Args:
+            data: Raw bytes of the upload
+            extension: File extension without the dot, e.g. 'jpg'
+            digest: Hex SHA-256 of data when the caller already computed it
+
+        Returns:
+            Relative path of the form 'ab/cd/<sha256>.<extension>'; two levels of
+            shard directories keep any one directory small
+        """
+        digest = digest or hashlib.sha256(data).hexdigest()
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension.lower()}"
+
+    @staticmethod
+    def is_content_addressed(filename):
+        """
+        Whether a stored name is derived from its content, so its bytes can never change
+
+        Args:
+            filename: Name recorded in Prediction.filename or Translation.image_path
+
+        Returns:
+            True for names made by filename_for, including older unsharded ones
+        """
+        return bool(_CONTENT_ADDRESSED.match(filename))
+
+    def save_async(self, data, extension, digest=None):
+        """
+        Schedule an upload to be written and return its filename straight away
+
+        Args:
+            data: Raw bytes of the upload
+            extension: File extension without the dot
+            digest: Hex SHA-256 of data when the caller already computed it
+
+        Returns:
+            Filename relative to upload_folder (the file may not exist yet)
+        """
+        filename = self.filename_for(data, extension, digest)
+        self._get_executor().submit(self._write, filename, data)
+        return filename
+
+    def store_file(self, path, extension):
+        """
+        Move a file that is already on disk (e.g. a large video) into the store
+
+        Args:
+            path: Temporary file to adopt; it is moved or removed
+            extension: File extension without the dot
+
+        Returns:
+            Filename relative to upload_folder
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        filename = self.filename_for(None, extension, digest.hexdigest())
+        target = self.path_for(filename)
+        if os.path.exists(target):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        return filename
+
+    def path_for(self, filename):
+        """
+        Absolute path of a stored upload
+
+        Args:
+            filename: Name returned by save_async or store_file
+
+        Returns:
+            Path under upload_folder
+        """
+        return os.path.join(self.upload_folder, *filename.split('/'))
+
+    def thumbnail_for(self, filename):
+        """
+        Path of an upload's thumbnail, made now if the upload predates thumbnails
+
+        Args:
+            filename: Name returned by save_async or store_file
+
+        Returns:
+            Absolute path of a JPEG thumbnail, or None if the upload is missing or not an image
+        """
+        thumbnail = self._thumbnail_path(filename)
+        if os.path.exists(thumbnail):
+            return thumbnail
+        try:
+            with open(self.path_for(filename), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        return thumbnail if self._write_thumbnail(filename, data) else None
+
+    def usage(self):
+        """
+        Measure what the store occupies on disk
+
+        Returns:
+            Dictionary with the number and total size of uploads and of thumbnails
+        """
+        totals = {'files': 0, 'bytes': 0, 'thumbnails': 0, 'thumbnail_bytes': 0}
+        for path, is_thumbnail in self._walk():
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            prefix = 'thumbnail' if is_thumbnail else 'file'
+            totals[prefix + 's'] += 1
+            totals[prefix + '_bytes' if is_thumbnail else 'bytes'] += size
+        return totals
+
+    def collect_garbage(self, referenced, grace_seconds=86400, now=None):
+        """
+        Delete uploads no history row points at, with their thumbnails
+
+        Files younger than grace_seconds are kept: their history rows may still be
+        queued in the background writer of this or another process.
+
+        Args:
+            referenced: Set of filenames still referenced
+            grace_seconds: Minimum age of a file before it may be deleted
+            now: Current time.time(), for tests
+
+        Returns:
+            Dictionary with the number of files removed and the bytes freed
+        """
+        cutoff = (now or time.time()) - grace_seconds
+        # A thumbnail lives exactly as long as its upload
+        thumbnails = {self._thumbnail_path(name) for name in referenced}
+        removed = freed = 0
+        for path, is_thumbnail in self._walk(include_temp=True):
+            if is_thumbnail:
+                keep = path in thumbnails
+            else:
+                keep = os.path.relpath(path, self.upload_folder).replace(os.sep, '/') in referenced
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if keep or stat.st_mtime > cutoff:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += stat.st_size
+        return {'removed': removed, 'bytes_freed': freed}
+
+    def close(self):
+        """Wait for pending writes and stop the background threads"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='upload-writer'
+                    )
+        return self._executor
+
+    def _write(self, filename, data):
+        path = self.path_for(filename)
+        if os.path.exists(path):
+            # Same content was already stored
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a private temp file and rename so readers never see a partial image
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        # Made once here, while the bytes are in memory, rather than on the first page view
+        self._write_thumbnail(filename, data)
+
+    def _thumbnail_path(self, filename):
+        return os.path.join(self.upload_folder, self.THUMBNAIL_DIR, *filename.rsplit('.', 1)[0].split('/')) + '.jpg'
+
+    def _write_thumbnail(self, filename, data):
+        from PIL import Image, UnidentifiedImageError
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                # JPEG draft mode decodes at a reduced scale, far cheaper than a full decode
+                image.draft('RGB', (self.thumbnail_size, self.thumbnail_size))
+                image = image.convert('RGB')
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                buffer = io.BytesIO()
+                image.save(buffer, 'JPEG', quality=80, optimize=True)
+        except (UnidentifiedImageError, OSError, ValueError):
+            return False
+
+        path = self._thumbnail_path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        return True
+
+    def _walk(self, include_temp=False):
+        thumbnail_root = os.path.join(self.upload_folder, self.THUMBNAIL_DIR)
+        for root, _, files in os.walk(self.upload_folder):
+            is_thumbnail = root == thumbnail_root or root.startswith(thumbnail_root + os.sep)
+            for name in files:
+                if name.endswith('.tmp') and not include_temp:
+                    continue
+                yield os.path.join(root, name), is_thumbnail
+
+
+def apply_references(connection, table, counts, now=None):
+    """
+    Add a batch's new references to the StoredUpload counters inside the caller's transaction
+
+    Args:
+        connection: Connection with an open transaction
+        table: StoredUpload table (path, ref_count, last_referenced_at)
+        counts: Dictionary of filename -> number of new history rows pointing at it
+        now: Timestamp written to last_referenced_at
+    """
+    now = now or datetime.utcnow()
+    for path, count in counts.items():
+        upsert(connection, table, {'path': path}, {'ref_count': count, 'last_referenced_at': now},
+               increment=('ref_count',), replace=('last_referenced_at',))
+
+
+def rebuild_references(connection, table, columns):
+    """
+    Recount every upload's references from the history tables
+
+    Args:
+        connection: Connection with an open transaction
+        table: StoredUpload table
+        columns: Columns holding stored filenames, e.g. Prediction.filename and Translation.image_path
+
+    Returns:
+        Set of filenames referenced at least once
+    """
+    counts = {}
+    for column in columns:
+        for path, count in connection.execute(select(column, func.count()).group_by(column)):
+            counts[path] = counts.get(path, 0) + count
+    connection.execute(table.delete())
+    if counts:
+        now = datetime.utcnow()
+        connection.execute(table.insert(), [
+            {'path': path, 'ref_count': count, 'last_referenced_at': now} for path, count in counts.items()
+        ])
+    return set(counts)
@@ -0,0 +1,207 @@
+import threading
+import time
+from datetime import date, datetime
+
+from sqlalchemy import Date, cast, func, select
+
+from utils.database import upsert
+
+
+class UsageDeltas:
+    """Per-user, per-class and per-day increments accumulated from one batch of history rows"""
+
+    __slots__ = ('users', 'classes', 'days')
+
+    def __init__(self):
+        # user_id -> [count, last_at]
+        self.users = {}
+        # (user_id, predicted_class) -> [count, confidence_sum]
+        self.classes = {}
+        # (user_id, day) -> [count, confidence_sum]
+        self.days = {}
+
+    def add(self, user_id, at, confidence, predicted_class=None):
+        """
+        Count one prediction or translation
+
+        Args:
+            user_id: Owner of the row
+            at: When the row was created
+            confidence: Confidence of the row
+            predicted_class: Class label for single-image predictions; None for translations
+        """
+        user = self.users.setdefault(user_id, [0, at])
+        user[0] += 1
+        if at > user[1]:
+            user[1] = at
+        day = self.days.setdefault((user_id, at.date()), [0, 0.0])
+        day[0] += 1
+        day[1] += confidence
+        if predicted_class is not None:
+            usage = self.classes.setdefault((user_id, predicted_class), [0, 0.0])
+            usage[0] += 1
+            usage[1] += confidence
+
+
+def apply_deltas(connection, tables, deltas, now=None):
+    """
+    Add a batch's increments to the aggregate tables inside the caller's transaction
+
+    Every row is upserted, so history writers in several processes can share the tables.
+
+    Args:
+        connection: Connection with an open transaction
+        tables: Dictionary with the 'users' (UsageStatistics), 'classes' and 'days' tables
+        deltas: UsageDeltas to apply
+        now: Timestamp written to updated_at
+    """
+    now = now or datetime.utcnow()
+    users = tables['users']
+    for user_id, (count, last_at) in deltas.users.items():
+        upsert(
+            connection, users, {'user_id': user_id},
+            {'translations_count': count, 'last_translation_at': last_at, 'created_at': now, 'updated_at': now},
+            increment=('translations_count',),
+            # Rows are queued in request order, so a batch's newest row is the user's newest overall
+            replace=('last_translation_at', 'updated_at')
+        )
+    for (user_id, predicted_class), (count, confidence_sum) in deltas.classes.items():
+        upsert(connection, tables['classes'], {'user_id': user_id, 'predicted_class': predicted_class},
+               {'count': count, 'confidence_sum': confidence_sum}, increment=('count', 'confidence_sum'))
+    for (user_id, day), (count, confidence_sum) in deltas.days.items():
+        upsert(connection, tables['days'], {'user_id': user_id, 'day': day},
+               {'count': count, 'confidence_sum': confidence_sum}, increment=('count', 'confidence_sum'))
+
+
+def _day(column, dialect):
+    # SQLite has no DATE type: date() yields 'YYYY-MM-DD' text, which CAST would truncate to the year
+    return func.date(column) if dialect == 'sqlite' else cast(column, Date)
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild(connection, tables, predictions, translations):
+    """
+    Recompute every aggregate from the raw history tables
+
+    Only grouped rows (users x classes and users x days) travel to Python, never the history itself.
+
+    Args:
+        connection: Connection with an open transaction
+        tables: Dictionary with the 'users', 'classes' and 'days' tables
+        predictions: Prediction table (user_id, predicted_class, confidence, timestamp)
+        translations: Translation table (user_id, confidence, created_at)
+
+    Returns:
+        Dictionary with the number of rows written to each aggregate table
+    """
+    dialect = connection.dialect.name
+    now = datetime.utcnow()
+    for table in tables.values():
+        connection.execute(table.delete())
+
+    class_rows = connection.execute(
+        select(predictions.c.user_id, predictions.c.predicted_class,
+               func.count(), func.sum(predictions.c.confidence))
+        .group_by(predictions.c.user_id, predictions.c.predicted_class)
+    ).fetchall()
+
+    days, users = {}, {}
+    sources = ((predictions, predictions.c.timestamp), (translations, translations.c.created_at))
+    for table, time_column in sources:
+        day = _day(time_column, dialect)
+        grouped = connection.execute(
+            select(table.c.user_id, day, func.count(), func.sum(table.c.confidence), func.max(time_column))
+            .group_by(table.c.user_id, day)
+        )
+        for user_id, day_value, count, confidence_sum, last_at in grouped:
+            entry = days.setdefault((user_id, _as_date(day_value)), [0, 0.0])
+            entry[0] += count
+            entry[1] += confidence_sum or 0.0
+            user = users.setdefault(user_id, [0, last_at])
+            user[0] += count
+            if last_at is not None and (user[1] is None or last_at > user[1]):
+                user[1] = last_at
+
+    if users:
+        connection.execute(tables['users'].insert(), [
+            {'user_id': user_id, 'translations_count': count, 'last_translation_at': last_at,
+             'created_at': now, 'updated_at': now}
+            for user_id, (count, last_at) in users.items()
+        ])
+    if class_rows:
+        connection.execute(tables['classes'].insert(), [
+            {'user_id': user_id, 'predicted_class': label, 'count': count, 'confidence_sum': confidence_sum or 0.0}
+            for user_id, label, count, confidence_sum in class_rows
+        ])
+    if days:
+        connection.execute(tables['days'].insert(), [
+            {'user_id': user_id, 'day': day, 'count': count, 'confidence_sum': confidence_sum}
+            for (user_id, day), (count, confidence_sum) in days.items()
+        ])
+    return {'users': len(users), 'classes': len(class_rows), 'days': len(days)}
+
+
+class StatsCache:
+    """Small thread-safe TTL cache of rendered per-user stats"""
+
+    def __init__(self, ttl_seconds=30.0, max_entries=10000):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Age after which an entry is recomputed; covers writes made by other processes
+            max_entries: Entries kept before the oldest is dropped
+        """
+        self.ttl = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key, e.g. a user id
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+            return value
+
+    def put(self, key, value):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to cache; shared with later hits, so it must not be mutated
+        """
+        with self._lock:
+            # Re-inserting keeps the dict in storage order, so the first key is always the oldest
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            if len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def discard(self, keys):
+        """
+        Drop entries whose underlying data changed
+
+        Args:
+            keys: Iterable of cache keys
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
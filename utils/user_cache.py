@@ -0,0 +1,178 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+
+def credential_fingerprint(password_hash):
+    """
+    Derive a short per-user secret from the stored password hash
+
+    It changes whenever the password does, so tokens carrying it stop working then.
+
+    Args:
+        password_hash: User.password_hash
+
+    Returns:
+        Hex digest string
+    """
+    return hashlib.sha256(password_hash.encode('utf-8')).hexdigest()[:32]
+
+
+class UserIdentity(UserMixin):
+    """Detached, read-only snapshot of the User columns a request needs"""
+
+    def __init__(self, id, username, email, credential=None):
+        self.id = id
+        self.username = username
+        self.email = email
+        # credential_fingerprint of the password hash; binds API tokens to the current password
+        self.credential = credential
+
+    @classmethod
+    def from_user(cls, user):
+        """
+        Copy a User row so no database session is held on to
+
+        Args:
+            user: app.User instance
+
+        Returns:
+            UserIdentity with the same id, username and email, and the password hash's fingerprint
+        """
+        return cls(user.id, user.username, user.email, credential_fingerprint(user.password_hash))
+
+
+class UserCache:
+    """Per-process LRU/TTL cache of UserIdentity objects for the Flask-Login user loader"""
+
+    def __init__(self, ttl_seconds=300.0, max_entries=10000):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Age after which an identity is reloaded; 0 disables caching
+            max_entries: Identities kept before the least recently used is evicted
+        """
+        self.ttl = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, load):
+        """
+        Return the cached identity, loading it on a miss
+
+        Args:
+            user_id: Primary key of the user
+            load: Callable taking user_id and returning a UserIdentity or None
+
+        Returns:
+            UserIdentity, or None if the user does not exist
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Loaded outside the lock so one slow query never blocks other users' requests
+        identity = load(user_id)
+        if identity is not None and self.ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (time.monotonic(), identity)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id):
+        """
+        Drop a user's identity after logout or a profile change
+
+        Args:
+            user_id: Primary key of the user
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            Dictionary with hits, misses and current size
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+class TokenSigner:
+    """Signed, expiring bearer tokens bound to a user's current password"""
+
+    def __init__(self, secret_key, max_age=3600, salt='api-token'):
+        """
+        Initialize the signer
+
+        Args:
+            secret_key: Application SECRET_KEY
+            max_age: Seconds a token stays valid
+            salt: Namespaces these signatures away from the session cookie's
+        """
+        self.max_age = max_age
+        # Without a SECRET_KEY no token can be issued and every token is rejected
+        self._serializer = URLSafeTimedSerializer(secret_key, salt=salt) if secret_key else None
+
+    def issue(self, identity):
+        """
+        Create a token for a user
+
+        Args:
+            identity: UserIdentity carrying the user's credential fingerprint
+
+        Returns:
+            Token string for an 'Authorization: Bearer' header
+
+        Raises:
+            RuntimeError: If the application has no SECRET_KEY
+            ValueError: If the identity has no credential fingerprint
+        """
+        if self._serializer is None:
+            raise RuntimeError('SECRET_KEY must be set to issue API tokens')
+        if not identity.credential:
+            raise ValueError('Cannot issue a token for an identity without a credential fingerprint')
+        return self._serializer.dumps([identity.id, identity.credential])
+
+    def verify(self, token, load):
+        """
+        Check a token's signature and age, and that it was issued for the user's current password
+
+        Args:
+            token: Token string from the client
+            load: Callable taking a user id and returning the current UserIdentity or None,
+                e.g. a UserCache lookup
+
+        Returns:
+            UserIdentity, or None if the token is forged, malformed, expired, or issued before
+            the password last changed
+        """
+        if self._serializer is None:
+            return None
+        try:
+            user_id, credential = self._serializer.loads(token, max_age=self.max_age)
+        except (BadSignature, SignatureExpired, ValueError, TypeError):
+            return None
+        identity = load(user_id)
+        if identity is None or not identity.credential or not isinstance(credential, str):
+            return None
+        if not hmac.compare_digest(identity.credential, credential):
+            return None
+        return identity
@@ -0,0 +1,164 @@
+import queue
+import threading
+
+import numpy as np
+
+from utils.preprocessing import MODEL_INPUT_SIZE, array_to_tensor
+
+# Marks the end of the decoded frame stream
+_END = object()
+
+
+def sample_frames(video_path, frames_per_second=5, max_duration=30, size=MODEL_INPUT_SIZE):
+    """
+    Stream model input tensors from a video at a fixed sampling rate
+
+    Frames between samples are only grabbed, never converted, and nothing but the
+    current frame is held in memory.
+
+    Args:
+        video_path: Path to an mp4/mov/avi/webm file
+        frames_per_second: Number of frames sampled per second of video
+        max_duration: Seconds of video to read; the rest is ignored
+        size: (width, height) the model expects
+
+    Yields:
+        (timestamp_seconds, float32 tensor of shape (height, width, 3))
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video '{video_path}'")
+    try:
+        native_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, int(round(native_fps / frames_per_second)))
+        index = 0
+        while index / native_fps < max_duration:
+            if not capture.grab():
+                break
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index / native_fps, array_to_tensor(frame, size, bgr=True)
+            index += 1
+    finally:
+        capture.release()
+
+
+def recognize_video(video_path, predict_batch, class_labels, frames_per_second=5, max_duration=30,
+                    batch_size=16, queue_size=32):
+    """
+    Predict a sign for every sampled frame of a video
+
+    Frames are decoded on a background thread while the model runs on the previous
+    batch. The queue between them is bounded, so memory stays flat however long the
+    video is.
+
+    Args:
+        video_path: Path to the video file
+        predict_batch: Callable mapping an (N, 64, 64, 3) float32 batch to (N, num_classes) probabilities
+        class_labels: List of class labels indexed by model output
+        frames_per_second: Number of frames sampled per second of video
+        max_duration: Seconds of video to read
+        batch_size: Number of frames per forward pass
+        queue_size: Number of decoded frames allowed to wait for inference
+
+    Returns:
+        List of dictionaries with time, predicted_class and confidence, in time order
+    """
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def decode():
+        try:
+            for item in sample_frames(video_path, frames_per_second, max_duration):
+                # Re-check the stop flag so an aborted consumer never leaves this thread blocked
+                while not stop.is_set():
+                    try:
+                        frames.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            frames.put(_END)
+
+    decoder = threading.Thread(target=decode, name='video-decoder', daemon=True)
+    decoder.start()
+
+    batch = None
+    timestamps = []
+    results = []
+    try:
+        finished = False
+        while not finished:
+            del timestamps[:]
+            while len(timestamps) < batch_size:
+                item = frames.get()
+                if item is _END:
+                    finished = True
+                    break
+                timestamp, tensor = item
+                if batch is None:
+                    batch = np.empty((batch_size,) + tensor.shape, dtype=np.float32)
+                batch[len(timestamps)] = tensor
+                timestamps.append(timestamp)
+
+            if timestamps:
+                predictions = np.asarray(predict_batch(batch[:len(timestamps)]))
+                pred_class_idx = np.argmax(predictions, axis=1)
+                for i, timestamp in enumerate(timestamps):
+                    idx = int(pred_class_idx[i])
+                    results.append({
+                        'time': round(timestamp, 3),
+                        'predicted_class': class_labels[idx],
+                        'confidence': float(predictions[i][idx])
+                    })
+    finally:
+        stop.set()
+        # Unblock a decoder still waiting on a full queue
+        while decoder.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                decoder.join(timeout=0.1)
+
+    if errors:
+        raise errors[0]
+    return results
+
+
+def to_segments(frame_predictions):
+    """
+    Merge consecutive frames with the same prediction into time-aligned segments
+
+    Args:
+        frame_predictions: Output of recognize_video
+
+    Returns:
+        List of dictionaries with letter, start, end and mean confidence
+    """
+    segments = []
+    for frame in frame_predictions:
+        if segments and segments[-1]['letter'] == frame['predicted_class']:
+            segment = segments[-1]
+            segment['end'] = frame['time']
+            segment['_confidences'].append(frame['confidence'])
+        else:
+            segments.append({
+                'letter': frame['predicted_class'],
+                'start': frame['time'],
+                'end': frame['time'],
+                '_confidences': [frame['confidence']]
+            })
+
+    for segment in segments:
+        confidences = segment.pop('_confidences')
+        segment['confidence'] = sum(confidences) / len(confidences)
+    return segments
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+
+from utils.preprocessing import decode_frame, raw_to_array
+
+
+def serve_webcam_stream(ws, decoder, raw_size=None):
+    """
+    Answer a stream of webcam frames over one WebSocket until the client disconnects
+
+    Each binary message is one encoded frame (JPEG or PNG), or with raw_size one raw RGB
+    frame already downsampled by the browser; each reply is a JSON object with the
+    smoothed prediction, any newly emitted letter and the text decoded so far.
+    Frames that arrive while the model is busy are dropped, so a slow server never
+    answers with a prediction for an old pose.
+
+    Args:
+        ws: Connected WebSocket (flask-sock / simple-websocket)
+        decoder: SignStreamDecoder holding this connection's state
+        raw_size: (width, height) of raw RGB frames; None expects encoded images
+    """
+    dropped = 0
+    while True:
+        frame = ws.receive()
+        if frame is None:
+            break
+
+        # Only the newest frame matters; anything that queued up behind inference is stale
+        while True:
+            newer = ws.receive(timeout=0)
+            if newer is None:
+                break
+            frame = newer
+            dropped += 1
+
+        if isinstance(frame, str):
+            ws.send(json.dumps({'error': 'Frames must be sent as binary messages'}))
+            continue
+
+        if raw_size is not None:
+            try:
+                # The decoder works on OpenCV's BGR order; swapping 64x64 pixels costs next to nothing
+                img = np.ascontiguousarray(raw_to_array(frame, raw_size)[:, :, ::-1])
+            except ValueError as e:
+                ws.send(json.dumps({'error': str(e)}))
+                continue
+        else:
+            img = decode_frame(frame)
+            if img is None:
+                ws.send(json.dumps({'error': 'Could not decode frame'}))
+                continue
+
+        result = decoder.process(img)
+        ws.send(json.dumps({
+            'prediction': result['prediction'],
+            'confidence': round(result['confidence'] * 100, 2),
+            'emitted': result['emitted'],
+            'text': result['text'],
+            'skipped': result['skipped'],
+            'dropped': dropped,
+            'model_calls': decoder.model_calls,
+            'frames': decoder.frames
+        }))
@@ -0,0 +1,467 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from utils.prediction_result import top_k_results
+from utils.preprocessing import MODEL_INPUT_SIZE, array_to_tensor
+from utils.shm_ring import SharedSlotRing
+
+# Control messages a worker sends after trying to load its model
+_READY = 'ready'
+_FAILED = 'failed'
+
+# Seconds before a worker that failed to load its model is started again (the file may be mid-replace)
+RESPAWN_DELAY = 5.0
+# Longest wait in close() for a worker to drain its queue before it is terminated
+_CLOSE_TIMEOUT = 30.0
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when the pool already holds its maximum number of pending requests"""
+
+
+class InferenceTimeoutError(TimeoutError):
+    """Raised when a worker does not answer within the request timeout"""
+
+
+def _configure_worker(cores, num_threads):
+    # Must run before TensorFlow or any BLAS library is imported in this process
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    if num_threads:
+        for name in ('TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS', 'OMP_NUM_THREADS'):
+            os.environ[name] = str(num_threads)
+
+
+def _worker_main(worker_id, model_path, backend, num_threads, cores, max_batch_size, requests, responses,
+                 ring_specs=None, watch_interval=0):
+    _configure_worker(cores, num_threads)
+    # Shared memory ring the web process writes single tensors into
+    rings = {kind: SharedSlotRing(**spec) for kind, spec in (ring_specs or {}).items()}
+
+    from utils.backends import resolve_backend_name
+    if num_threads and resolve_backend_name(model_path, backend) == 'keras':
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(num_threads)
+
+    from utils.model_registry import ModelRegistry
+    # Each worker watches the model file itself and swaps in a new version between batches
+    registry = ModelRegistry(model_path, backend=backend, num_threads=num_threads, keep_versions=1,
+                             watch_interval=watch_interval)
+    try:
+        predictor = registry.get()
+    except Exception as e:
+        responses.put((_FAILED, worker_id, repr(e)))
+        return
+    responses.put((_READY, worker_id, predictor.model_version))
+
+    stopping = False
+    while not stopping:
+        item = requests.get()
+        if item is None:
+            break
+
+        # Anything else already queued joins this forward pass
+        items = [_unpack(item, rings)]
+        rows = len(items[0][1])
+        while rows < max_batch_size:
+            try:
+                item = requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            items.append(_unpack(item, rings))
+            rows += len(items[-1][1])
+
+        # One version for the whole forward pass, even if a swap lands meanwhile
+        predictor = registry.get()
+        try:
+            # Concatenating copies every slot out of shared memory before the answer frees it
+            predictions = np.asarray(predictor.predict_batch(np.concatenate([batch for _, batch in items])))
+        except Exception as e:
+            for request_id, _ in items:
+                responses.put((request_id, None, repr(e)))
+            continue
+
+        offset = 0
+        for request_id, batch in items:
+            responses.put((request_id, (predictions[offset:offset + len(batch)], predictor.model_version), None))
+            offset += len(batch)
+
+
+def _unpack(item, rings):
+    # Returns (request_id, batch); slot payloads are views, so nothing is copied yet
+    request_id, kind, payload = item
+    if kind == 'tensor':
+        return request_id, rings['tensor'].view(payload)[np.newaxis]
+    return request_id, payload
+
+
+class _PoolRequest:
+    """Bookkeeping for one request travelling through the pool"""
+
+    __slots__ = ('future', 'released', 'ring', 'slot')
+
+    def __init__(self, ring=None, slot=None):
+        self.future = Future()
+        self.released = False
+        self.ring = ring
+        self.slot = slot
+
+
+class InferenceWorkerPool:
+    """Runs ISLModelPredictor in separate processes so inference scales past the GIL"""
+
+    def __init__(self, model_path, class_labels, num_workers=None, backend=None, threads_per_worker=1,
+                 max_pending=256, timeout=10.0, max_batch_size=16, pin_cores=True, tensor_slots=0,
+                 top_k=3, watch_interval=0):
+        """
+        Describe the pool; worker processes start on first use
+
+        Args:
+            model_path: Path to the saved model (.keras, .tflite or .onnx)
+            class_labels: List of class labels indexed by model output
+            num_workers: Number of worker processes; defaults to the CPU count
+            backend: Runtime backend name; inferred from model_path when None
+            threads_per_worker: Intra/inter-op threads each worker's runtime may use
+            max_pending: Requests allowed in the pool before new ones are rejected with PoolBusyError
+            timeout: Seconds a request may wait for its result
+            max_batch_size: Largest number of samples a worker runs in one forward pass
+            pin_cores: Pin each worker to its own set of threads_per_worker cores where the OS supports it
+            tensor_slots: Shared memory slots for 64x64x3 float32 tensors; 0 sends tensors through the queue
+            top_k: Number of best classes each result keeps
+            watch_interval: Seconds between each worker's checks of model_path for a new version; 0 disables
+        """
+        self.model_path = model_path
+        self.class_labels = class_labels
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.threads_per_worker = threads_per_worker
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.pin_cores = pin_cores
+        self.tensor_slots = tensor_slots
+        self.top_k = top_k
+        self.watch_interval = watch_interval
+        self._model_version = None
+        self._rings = {}
+
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.load_failures = 0
+        self.last_error = None
+        self.queue_transfers = 0
+        self.shm_transfers = 0
+
+        self._pending = {}
+        self._ids = itertools.count()
+        self._capacity = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._processes = []
+        self._collector = None
+        # _closed stops new requests and respawns; _stopped ends the collector once the workers have exited
+        self._closed = False
+        self._stopped = False
+        self._startup_error = None
+        # worker id -> monotonic time before which a worker that failed to load is not respawned
+        self._retry_at = {}
+
+    def start(self):
+        """Start the worker processes and wait until every one has loaded the model"""
+        with self._lock:
+            if self._collector is None:
+                # TensorFlow is not fork-safe, so workers always start from a clean interpreter
+                context = multiprocessing.get_context('spawn')
+                self._requests = context.Queue()
+                self._responses = context.Queue()
+                self._context = context
+                self._ready_workers = set()
+                if self.tensor_slots:
+                    self._rings['tensor'] = SharedSlotRing(self.tensor_slots, MODEL_INPUT_SIZE[::-1] + (3,), np.float32)
+                self._processes = [self._spawn(worker_id) for worker_id in range(self.num_workers)]
+                self._collector = threading.Thread(
+                    target=self._collect, name='inference-pool-collector', daemon=True
+                )
+                self._collector.start()
+        # Every caller that arrives before the workers are ready waits here, not only the first
+        self._ready.wait()
+        error = self._startup_error
+        if error is not None:
+            # Failed workers are respawned after RESPAWN_DELAY, so a later call may succeed
+            raise RuntimeError(f"Inference worker could not load the model: {error}")
+
+    @property
+    def model_version(self):
+        """Version of the model behind the latest answer (starts the pool if needed)"""
+        if not self._ready.is_set():
+            self.start()
+        return self._model_version
+
+    def predict_batch(self, batch, timeout=None):
+        """
+        Run a batch on one of the workers
+
+        Args:
+            batch: Array of shape (N, 64, 64, 3) with values in [0, 1]
+            timeout: Seconds to wait; defaults to the pool timeout
+
+        Returns:
+            NumPy array of shape (N, num_classes) with class probabilities
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) == 1:
+            # Single samples (e.g. live stream frames) can ride the shared memory ring
+            answer = self._submit_to_ring('tensor', batch[0], timeout)
+            if answer is not None:
+                return answer[0]
+        return self._submit(batch, timeout)[0]
+
+    def predict(self, img_array, timeout=None):
+        """
+        Predict one preprocessed image, the same way BatchingInferenceEngine.predict does
+
+        Args:
+            img_array: Array of shape (64, 64, 3) or (1, 64, 64, 3)
+            timeout: Seconds to wait; defaults to the pool timeout
+
+        Returns:
+            PredictionResult with predicted class, confidence and top-k
+        """
+        tensor = np.asarray(img_array, dtype=np.float32).reshape(MODEL_INPUT_SIZE[::-1] + (3,))
+        answer = self._submit_to_ring('tensor', tensor, timeout)
+        if answer is None:
+            answer = self._submit(tensor[np.newaxis], timeout)
+        predictions, model_version = answer
+        return top_k_results(predictions, self.class_labels, self.top_k, model_version=model_version)[0]
+
+    def process_video_frame(self, frame, all_probabilities=False):
+        """
+        Predict a BGR video frame, mirroring ISLModelPredictor.process_video_frame
+
+        Args:
+            frame: NumPy array representing a video frame
+            all_probabilities: Also keep the full probability distribution
+
+        Returns:
+            PredictionResult with predicted class, confidence and top-k
+        """
+        # Resized here: a 64x64 tensor crosses to the worker instead of the full frame
+        tensor = array_to_tensor(frame, bgr=True)
+        answer = self._submit_to_ring('tensor', tensor, None)
+        if answer is None:
+            answer = self._submit(tensor[np.newaxis], None)
+        predictions, model_version = answer
+        return top_k_results(predictions, self.class_labels, self.top_k, all_probabilities, model_version)[0]
+
+    def stats(self):
+        """
+        Report pool health
+
+        Returns:
+            Dictionary with worker liveness, queue depth and request counters
+        """
+        with self._lock:
+            alive = sum(1 for process in self._processes if process.is_alive())
+            return {
+                'mode': 'process-pool',
+                'workers': self.num_workers,
+                'workers_alive': alive,
+                'ready': self._ready.is_set(),
+                'queue_depth': len(self._pending),
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts,
+                'load_failures': self.load_failures,
+                'last_error': self.last_error,
+                'queue_transfers': self.queue_transfers,
+                'shm_transfers': self.shm_transfers,
+                'free_slots': {kind: ring.free_slots() for kind, ring in self._rings.items()},
+                'model_version': self._model_version
+            }
+
+    def close(self):
+        """Stop the workers after the requests already queued have been served, then free shared memory"""
+        with self._lock:
+            if self._collector is None or self._closed:
+                return
+            self._closed = True
+            processes = list(self._processes)
+        for process in processes:
+            if process.is_alive():
+                self._requests.put(None)
+        # The collector keeps draining responses meanwhile, so no worker blocks on a full pipe
+        for process in processes:
+            process.join(_CLOSE_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._stopped = True
+        self._collector.join()
+        with self._lock:
+            # Taken by a worker that was terminated, or never taken at all
+            abandoned = list(self._pending.values())
+            self._pending.clear()
+            for request in abandoned:
+                self._release(request)
+        for request in abandoned:
+            request.future.set_exception(RuntimeError('Inference pool closed before the request was served'))
+        for ring in self._rings.values():
+            ring.close()
+
+    def _spawn(self, worker_id):
+        cores = None
+        if self.pin_cores and hasattr(os, 'sched_getaffinity'):
+            available = sorted(os.sched_getaffinity(0))
+            per_worker = max(1, self.threads_per_worker)
+            if per_worker < len(available):
+                # Each worker gets as many cores as it runs threads, so its threads do not share one core
+                first = worker_id * per_worker
+                cores = {available[(first + i) % len(available)] for i in range(per_worker)}
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, self.model_path, self.backend, self.threads_per_worker, cores,
+                  self.max_batch_size, self._requests, self._responses,
+                  {kind: ring.describe() for kind, ring in self._rings.items()}, self.watch_interval),
+            name=f'inference-worker-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _submit_to_ring(self, kind, array, timeout):
+        # Returns (predictions, model_version), or None when there is no ring of this kind, the array is
+        # too big or every slot is busy
+        if not self._ready.is_set():
+            self.start()
+        ring = self._rings.get(kind)
+        if ring is None or not ring.fits(array.shape):
+            return None
+        slot = ring.acquire()
+        if slot is None:
+            return None
+        # The only copy: straight into shared memory, no pickling on either side
+        ring.view(slot, array.shape)[...] = array
+        try:
+            return self._submit(slot, timeout, kind=kind, ring=ring, slot=slot)
+        except PoolBusyError:
+            ring.release(slot)
+            raise
+
+    def _submit(self, payload, timeout, kind='array', ring=None, slot=None):
+        if not self._ready.is_set() or self._startup_error is not None:
+            self.start()
+        if self._closed:
+            raise PoolBusyError('Inference pool is shutting down')
+        if not self._capacity.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError(f"Inference pool is full ({self.max_pending} pending requests)")
+
+        request_id = next(self._ids)
+        request = _PoolRequest(ring, slot)
+        with self._lock:
+            self._pending[request_id] = request
+            if ring is None:
+                self.queue_transfers += 1
+            else:
+                self.shm_transfers += 1
+        self._requests.put((request_id, kind, payload))
+
+        try:
+            return request.future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+                self._pending.pop(request_id, None)
+                self._release(request)
+            raise InferenceTimeoutError(f"No inference result within {self.timeout if timeout is None else timeout} s")
+
+    def _release(self, request):
+        # Called with self._lock held; whichever of response or timeout comes first frees the slot
+        if not request.released:
+            request.released = True
+            self._capacity.release()
+            if request.ring is not None:
+                # A late worker may still read a slot freed by a timeout; that result is discarded anyway
+                request.ring.release(request.slot)
+
+    def _collect(self):
+        next_check = time.monotonic() + 1.0
+        while True:
+            # Checked on a clock, not only when idle, so a busy pool also replaces its dead workers
+            if time.monotonic() >= next_check:
+                self._replace_dead_workers()
+                next_check = time.monotonic() + 1.0
+            stopped = self._stopped
+            try:
+                request_id, payload, error = self._responses.get(timeout=0.1 if stopped else 1.0)
+            except queue.Empty:
+                if stopped:
+                    # The workers have exited and everything they sent has been read
+                    return
+                continue
+
+            if request_id == _READY:
+                # payload is the worker id, error slot carries the model version
+                with self._lock:
+                    self._model_version = error
+                    self._ready_workers.add(payload)
+                    self._startup_error = None
+                    if len(self._ready_workers) == self.num_workers:
+                        self._ready.set()
+                continue
+            if request_id == _FAILED:
+                with self._lock:
+                    self._ready_workers.discard(payload)
+                    self.load_failures += 1
+                    self.last_error = error
+                    # Only this slot waits and retries; the file may be mid-replace rather than broken
+                    self._retry_at[payload] = time.monotonic() + RESPAWN_DELAY
+                    if not self._ready_workers:
+                        self._startup_error = error
+                # Callers stop waiting; ready workers keep serving, and with none they get the error
+                self._ready.set()
+                continue
+
+            with self._lock:
+                request = self._pending.pop(request_id, None)
+                if request is None:
+                    # The caller already gave up on this request
+                    continue
+                self._release(request)
+                self.completed += 1
+                if error is None:
+                    # Workers swap versions independently; report the one that answered last
+                    self._model_version = payload[1]
+            if error is None:
+                request.future.set_result(payload)
+            else:
+                request.future.set_exception(RuntimeError(f"Inference worker failed: {error}"))
+
+    def _replace_dead_workers(self):
+        with self._lock:
+            if self._closed:
+                return
+            now = time.monotonic()
+            for worker_id, process in enumerate(self._processes):
+                if not process.is_alive() and self._retry_at.get(worker_id, 0.0) <= now:
+                    # Requests the dead worker had taken are released by their timeouts
+                    self._ready_workers.discard(worker_id)
+                    self._retry_at.pop(worker_id, None)
+                    self._processes[worker_id] = self._spawn(worker_id)
+                    self.restarts += 1